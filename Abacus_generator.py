@@ -14,12 +14,17 @@ from src.pluto_tx_interface import PlutoTxInterface
 STABILIZATION_DELAY = 0.1  # s
 SPAN = 2e6
 RBW = 25e3
+MS2840A_RESOURCE = "TCPIP0::Anritsu-MS2840A::inst0::INSTR"
 
 
-def open_ms2840a():
+def open_ms2840a(resource=MS2840A_RESOURCE):
     rm = pyvisa.ResourceManager()
-    inst = rm.open_resource("TCPIP0::Anritsu-MS2840A::inst0::INSTR")
+    inst = rm.open_resource(resource)
     inst.timeout = 5000
+    if resource.endswith("::SOCKET"):
+        # Raw socket sessions (e.g. src.ms2840a_sim) need explicit line terminations
+        inst.read_termination = "\n"
+        inst.write_termination = "\n"
     inst.write("SYST:LANG SCPI")
     print(inst.query("*IDN?"))
     return inst
@@ -40,6 +45,39 @@ def measure_peak(inst, f_center, span, rbw):
     return p
 
 
+def measure_point(inst, tx_iface, utils, f_center, p_tx):
+    """
+    Transmit the calibration two-tone at (f_center, p_tx) and return the peak
+    level measured by the analyzer (dBm).
+
+    The waveform is the one IIP3Bench.send_tx emits (generate_two_tone_iq,
+    complex tones at ±delta_f/2 scaled to the DAC full scale), so the abacus
+    describes the bench per-tone level. Abacus files measured with the former
+    real-valued waveform (generate_two_tone_baseband, about 6 dB more per
+    tone) do not match send_tx and must be regenerated.
+    """
+    tx_params = TxParams(
+        f_rf=int(f_center),
+        delta_f=int(1e6),
+        fs=int(4e6),
+        pe_dbm=int(p_tx),
+        n_sample=int(4096),
+    )
+
+    signal_v, signal_codes = utils.generate_two_tone_iq(
+        pe_dbm=tx_params.pe_dbm,
+        delta_f=tx_params.delta_f,
+        fs=tx_params.fs,
+        n_sample=tx_params.n_sample,
+    )
+
+    tx_iface.configure_tx(tx_params)
+    tx_iface.load_waveform(signal_codes)
+
+    time.sleep(STABILIZATION_DELAY)
+    return measure_peak(inst, f_center, SPAN, RBW)
+
+
 class CalibrationApp:
     """
     Simple GUI wrapper to configure and run the TX power calibration sweep.
@@ -91,15 +129,24 @@ class CalibrationApp:
         self.p_step_var = tk.StringVar(value="1")
         ttk.Entry(main_frame, textvariable=self.p_step_var, width=10).grid(row=6, column=1, sticky="w", padx=5, pady=2)
 
+        # Adaptive sparse sampling
+        self.adaptive_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(main_frame, text="Adaptive sampling", variable=self.adaptive_var).grid(
+            row=7, column=0, sticky="e", padx=5, pady=2
+        )
+        ttk.Label(main_frame, text="Tolerance (dB):").grid(row=8, column=0, sticky="e", padx=5, pady=2)
+        self.tol_var = tk.StringVar(value="0.2")
+        ttk.Entry(main_frame, textvariable=self.tol_var, width=10).grid(row=8, column=1, sticky="w", padx=5, pady=2)
+
         # Status label
         self.status_var = tk.StringVar(value="Ready.")
         ttk.Label(main_frame, textvariable=self.status_var, foreground="blue").grid(
-            row=7, column=0, columnspan=2, sticky="w", padx=5, pady=5
+            row=9, column=0, columnspan=2, sticky="w", padx=5, pady=5
         )
 
         # Start button
         self.start_button = ttk.Button(main_frame, text="Start calibration", command=self.on_start)
-        self.start_button.grid(row=8, column=0, columnspan=2, pady=10)
+        self.start_button.grid(row=10, column=0, columnspan=2, pady=10)
 
     def on_start(self):
         """
@@ -118,6 +165,7 @@ class CalibrationApp:
             p_start = float(self.p_start_var.get())
             p_end = float(self.p_end_var.get())
             p_step = float(self.p_step_var.get())
+            tol_db = float(self.tol_var.get())
 
             if f_start_mhz <= 0 or f_end_mhz <= 0 or f_step_mhz <= 0:
                 raise ValueError("Frequencies must be positive and step > 0.")
@@ -127,6 +175,8 @@ class CalibrationApp:
                 raise ValueError("Power step must be > 0.")
             if p_end < p_start:
                 raise ValueError("End power must be >= start power.")
+            if tol_db <= 0:
+                raise ValueError("Tolerance must be > 0.")
 
             f_start = f_start_mhz * 1e6
             f_end = f_end_mhz * 1e6
@@ -141,16 +191,29 @@ class CalibrationApp:
         self.master.update_idletasks()
 
         try:
-            run_calibration(
-                filename=filename,
-                f_start=f_start,
-                f_end=f_end,
-                f_step=f_step,
-                p_start=p_start,
-                p_end=p_end,
-                p_step=p_step,
-                status_callback=self.set_status,
-            )
+            if self.adaptive_var.get():
+                run_calibration_adaptive(
+                    filename=filename,
+                    f_start=f_start,
+                    f_end=f_end,
+                    f_step=f_step,
+                    p_start=p_start,
+                    p_end=p_end,
+                    p_step=p_step,
+                    tol_db=tol_db,
+                    status_callback=self.set_status,
+                )
+            else:
+                run_calibration(
+                    filename=filename,
+                    f_start=f_start,
+                    f_end=f_end,
+                    f_step=f_step,
+                    p_start=p_start,
+                    p_end=p_end,
+                    p_step=p_step,
+                    status_callback=self.set_status,
+                )
             messagebox.showinfo("Done", f"Calibration finished and saved to:\n{filename}")
         except Exception as e:
             messagebox.showerror("Error during calibration", str(e))
@@ -175,6 +238,8 @@ def run_calibration(
     p_end,
     p_step,
     status_callback=None,
+    resource=MS2840A_RESOURCE,
+    tx_iface=None,
 ):
     """
     Run the full frequency/power sweep and save results to CSV.
@@ -182,6 +247,8 @@ def run_calibration(
     Parameters are all in SI units (Hz, dBm).
     The status_callback, if provided, is a function taking a single string
     to update the GUI status.
+    resource selects the analyzer VISA resource (e.g. a local MS2840A
+    simulator) and tx_iface an already opened TX interface.
     """
     def update_status(msg):
         if status_callback is not None:
@@ -208,8 +275,9 @@ def run_calibration(
     results = {f: {p: None for p in powers} for f in frequencies}
 
     # Initialize instruments
-    inst = open_ms2840a()
-    tx_iface = PlutoTxInterface("ip:192.168.2.1")
+    inst = open_ms2840a(resource)
+    if tx_iface is None:
+        tx_iface = PlutoTxInterface("ip:192.168.2.1")
     utils = signal_utils.SignalUtils()
 
     try:
@@ -218,25 +286,7 @@ def run_calibration(
             for f_center in frequencies:
                 update_status(f"Measuring at {f_center/1e9:.3f} GHz, {p_tx:.1f} dBm")
 
-                tx_params = TxParams(
-                    f_rf=int(f_center),
-                    delta_f=int(1e6),
-                    fs=int(4e6),
-                    pe_dbm=int(p_tx),
-                    n_sample=int(4096),
-                )
-
-                signal_v, signal_codes = utils.generate_two_tone_baseband(
-                    pe_dbm=tx_params.pe_dbm,
-                    delta_f=tx_params.delta_f,
-                    n_sample=tx_params.n_sample,
-                )
-
-                tx_iface.configure_tx(tx_params)
-                tx_iface.load_waveform(signal_codes)
-
-                time.sleep(STABILIZATION_DELAY)
-                p_meas = measure_peak(inst, f_center, SPAN, RBW)
+                p_meas = measure_point(inst, tx_iface, utils, f_center, p_tx)
                 results[f_center][p_tx] = p_meas
 
         # Final CSV write
@@ -252,6 +302,121 @@ def run_calibration(
     update_status("Calibration completed.")
 
 
+def sample_row_adaptive(measure, powers, tol_db, prior=None):
+    """
+    Measure one frequency row of the abacus sparsely.
+
+    'measure' is called with a power index and returns the measured level.
+    The row starts from a skeleton (both ends and the middle). The model is a
+    linear spline through the measured points or, when 'prior' (the dense row
+    of the neighbouring frequency) is given, that row plus a linear spline of
+    the residuals, since the abacus is smooth in frequency. Each interval is
+    verified at its midpoint: if the measurement deviates from the model by
+    more than tol_db, both halves are verified in turn.
+
+    Returns (row, mask): the dense model row (exact at measured cells) and a
+    boolean mask of measured cells.
+    """
+    n = len(powers)
+    mid = n // 2
+    measured = {i: measure(i) for i in sorted({0, mid, n - 1})}
+
+    def model():
+        idx = sorted(measured)
+        values = np.array([measured[i] for i in idx])
+        if prior is None:
+            return np.interp(powers, powers[idx], values)
+        return prior + np.interp(powers, powers[idx], values - prior[idx])
+
+    intervals = [(0, mid), (mid, n - 1)]
+    while intervals:
+        a, b = intervals.pop()
+        if b - a < 2:
+            continue
+        m = (a + b) // 2
+        # Prediction from the current model, then verification
+        pred = model()[m]
+        measured[m] = measure(m)
+        if abs(measured[m] - pred) > tol_db:
+            intervals.append((a, m))
+            intervals.append((m, b))
+
+    mask = np.zeros(n, dtype=bool)
+    mask[sorted(measured)] = True
+    return model(), mask
+
+
+def run_calibration_adaptive(
+    filename,
+    f_start,
+    f_end,
+    f_step,
+    p_start,
+    p_end,
+    p_step,
+    tol_db=0.2,
+    status_callback=None,
+    resource=MS2840A_RESOURCE,
+    tx_iface=None,
+):
+    """
+    Adaptive variant of run_calibration measuring only a sparse subset of cells.
+
+    Each frequency row is sampled with sample_row_adaptive, using the previous
+    row as shape prior, and completed by interpolation in power. The dense grid is written to 'filename' in
+    the same format as run_calibration (readable by TxCalibration), and the
+    measured-versus-predicted mask (1 = measured) to '<filename>_mask.csv'.
+    """
+    def update_status(msg):
+        if status_callback is not None:
+            status_callback(msg)
+        print(msg)
+
+    frequencies = np.arange(f_start, f_end + f_step / 2, f_step)
+    powers = np.arange(p_start, p_end + p_step / 2, p_step)
+    header = ["Frequency (Hz)"] + [str(int(p)) for p in powers]
+
+    inst = open_ms2840a(resource)
+    if tx_iface is None:
+        tx_iface = PlutoTxInterface("ip:192.168.2.1")
+    utils = signal_utils.SignalUtils()
+
+    grid = np.empty((len(frequencies), len(powers)))
+    mask = np.zeros((len(frequencies), len(powers)), dtype=bool)
+    try:
+        for i_f, f_center in enumerate(frequencies):
+            update_status(f"Adaptive sampling at {f_center/1e9:.3f} GHz")
+            # Previous frequency row serves as shape prior for this one
+            grid[i_f], mask[i_f] = sample_row_adaptive(
+                lambda i_p: measure_point(inst, tx_iface, utils, f_center, powers[i_p]),
+                powers,
+                tol_db,
+                prior=grid[i_f - 1] if i_f > 0 else None,
+            )
+    finally:
+        inst.close()
+
+    # Dense abacus and measured-cell mask, same layout
+    with open(filename, "w", newline="") as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(header)
+        for f_center, row in zip(frequencies, grid):
+            writer.writerow([f_center] + [round(float(v), 3) for v in row])
+
+    stem = filename[:-4] if filename.lower().endswith(".csv") else filename
+    with open(stem + "_mask.csv", "w", newline="") as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(header)
+        for f_center, row in zip(frequencies, mask):
+            writer.writerow([f_center] + [int(v) for v in row])
+
+    n_meas = int(mask.sum())
+    update_status(
+        f"Adaptive calibration completed: {n_meas}/{mask.size} cells measured "
+        f"({mask.size / max(n_meas, 1):.1f}x fewer)."
+    )
+
+
 if __name__ == "__main__":
     root = tk.Tk()
     app = CalibrationApp(root)
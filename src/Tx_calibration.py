@@ -1,5 +1,8 @@
 import csv
 import bisect
+import hashlib
+
+import numpy as np
 
 
 class TxCalibration:
@@ -9,6 +12,11 @@ class TxCalibration:
         self.powers = []     # List of commanded TX powers (dBm) corresponding to each column
         self.grid = []       # 2D matrix of measured values or corrections (dBm)
 
+        # Content hash identifies the calibration independently of its file name
+        self.csv_path = csv_path
+        with open(csv_path, "rb") as f:
+            self.content_hash = hashlib.sha256(f.read()).hexdigest()
+
         # Read entire CSV file into memory
         with open(csv_path, newline="") as f:
             reader = csv.reader(f)
@@ -22,6 +30,17 @@ class TxCalibration:
             self.freqs.append(f_rf)
             self.grid.append([float(x) for x in r[1:]])
 
+    @classmethod
+    def from_arrays(cls, freqs, powers, grid, source=None, content_hash=None):
+        # Build a calibration from an already parsed grid (e.g. from a calibration bundle)
+        self = cls.__new__(cls)
+        self.freqs = [float(f) for f in freqs]
+        self.powers = [float(p) for p in powers]
+        self.grid = np.asarray(grid, dtype=np.float64).tolist()
+        self.csv_path = source
+        self.content_hash = content_hash
+        return self
+
     def _nearest_index(self, values, x):
         # Return index of the closest value to x in a sorted list
         idx = bisect.bisect_left(values, x)
@@ -55,3 +74,50 @@ class TxCalibration:
         f_ref = self.freqs[i_f]
         p_ref = self.powers[i_p]
         return corr_db, f_ref, p_ref
+
+    def get_slope(self, f_rf_user, p_tx_user):
+        # Local slope d(measured)/d(commanded) of the grid around the nearest calibration point
+        if not (self.freqs[0] <= f_rf_user <= self.freqs[-1]):
+            raise ValueError("f_rf outside of abacus")
+        if not (self.powers[0] <= p_tx_user <= self.powers[-1]):
+            raise ValueError("P_tx outside of abacus")
+
+        i_f = self._nearest_index(self.freqs, f_rf_user)
+        i_p = self._nearest_index(self.powers, p_tx_user)
+
+        # Central difference inside the grid, one-sided at the edges
+        i_lo = max(i_p - 1, 0)
+        i_hi = min(i_p + 1, len(self.powers) - 1)
+        if i_hi == i_lo:
+            return 1.0
+        row = self.grid[i_f]
+        return (row[i_hi] - row[i_lo]) / (self.powers[i_hi] - self.powers[i_lo])
+
+    def _nearest_index_array(self, values, x):
+        # Vectorized _nearest_index: same tie rule (lower neighbour wins)
+        values = np.asarray(values)
+        idx = np.searchsorted(values, x, side="left")
+        lo = np.clip(idx - 1, 0, len(values) - 1)
+        hi = np.clip(idx, 0, len(values) - 1)
+        return np.where(np.abs(x - values[lo]) <= np.abs(x - values[hi]), lo, hi)
+
+    def get_correction_array(self, f_rf_user, p_tx_user):
+        # Vectorized get_correction over arrays of frequencies and commanded powers
+        """
+        Returns (corr_db, in_range): corrections from the nearest grid point
+        for every (f_rf, P_tx) pair, and a mask of pairs inside the abacus.
+        Out-of-range pairs get the correction of the nearest edge point.
+        """
+        f = np.asarray(f_rf_user, dtype=np.float64)
+        p = np.asarray(p_tx_user, dtype=np.float64)
+        f, p = np.broadcast_arrays(f, p)
+        grid = np.asarray(self.grid, dtype=np.float64)
+
+        in_range = (
+            (f >= self.freqs[0]) & (f <= self.freqs[-1])
+            & (p >= self.powers[0]) & (p <= self.powers[-1])
+        )
+        i_f = self._nearest_index_array(self.freqs, f)
+        i_p = self._nearest_index_array(self.powers, p)
+        corr_db = p - grid[i_f, i_p]
+        return corr_db, in_range
@@ -0,0 +1,140 @@
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from itertools import groupby
+
+from src.error_manager import ErrorManager
+from src.iip3_bench import IIP3Bench
+from src.pluto_rx_interface import PlutoRxInterface
+from src.pluto_tx_interface import PlutoTxInterface
+from src.signal_utils import SignalUtils
+from src.Tx_calibration import TxCalibration
+
+
+@dataclass
+class BenchSpec:
+    # One TX/RX Pluto pair and its TX calibration
+    name: str                   # Unit name, also used to find '<name>_tx_charac.csv'
+    tx_uri: str                 # IIO URI of the TX Pluto (e.g. "ip:192.168.2.1")
+    rx_uri: str                 # IIO URI of the RX Pluto
+    calib_path: str = None      # Explicit calibration file, overrides the automatic choice
+
+
+def find_calibration(name, calib_dir="Data_Calibration_tx"):
+    # Calibration file of a unit by the repo naming convention, or None
+    path = os.path.join(calib_dir, f"{name}_tx_charac.csv")
+    return path if os.path.isfile(path) else None
+
+
+def _prefixed_log(err_mgr: ErrorManager, name):
+    # Log callback forwarding formatted messages to err_mgr's output with a bench prefix
+    def emit(msg):
+        if err_mgr.log_callback is not None:
+            err_mgr.log_callback(f"[{name}] {msg}")
+        else:
+            print(f"[{name}] {msg}")
+    return emit
+
+
+class MultiBenchOrchestrator:
+    """
+    Runs one sweep plan over several independent benches in parallel.
+
+    Each bench is driven by its own thread, which pulls work from a shared
+    queue. Points at the same RF frequency are kept together as one work item,
+    so a bench reuses its LO tuning within the item. Faster benches simply
+    take more items. Results are merged back in plan order.
+    """
+
+    def __init__(self, benches, err_mgr: ErrorManager = None):
+        # benches: list of (name, IIP3Bench)
+        self.benches = list(benches)
+        self.err_mgr = err_mgr if err_mgr is not None else ErrorManager()
+
+    @classmethod
+    def from_specs(cls, specs, calib_dir="Data_Calibration_tx", err_mgr: ErrorManager = None):
+        # Build one IIP3Bench per BenchSpec, picking each unit's calibration file
+        err_mgr = err_mgr if err_mgr is not None else ErrorManager()
+        benches = []
+        for spec in specs:
+            calib_path = spec.calib_path or find_calibration(spec.name, calib_dir)
+            calib = None
+            if calib_path is not None:
+                calib = TxCalibration(calib_path)
+                err_mgr.info(f"{spec.name}: calibration {calib_path}")
+            else:
+                err_mgr.warning(f"{spec.name}: no calibration file found, TX levels uncorrected")
+
+            # Per-bench log prefix so interleaved messages stay readable
+            bench_log = ErrorManager(_prefixed_log(err_mgr, spec.name))
+
+            tx_iface = PlutoTxInterface(spec.tx_uri)
+            rx_iface = PlutoRxInterface(spec.rx_uri)
+            if not (tx_iface.is_connected() and rx_iface.is_connected()):
+                err_mgr.error(f"{spec.name}: Pluto pair not connected, bench skipped")
+                continue
+            benches.append((spec.name, IIP3Bench(tx_iface, rx_iface, SignalUtils(), bench_log, calib)))
+        return cls(benches, err_mgr)
+
+    def _worker(self, name, bench, work, results, stats):
+        # Measure work items until the queue is empty
+        n_points = 0
+        busy = 0.0
+        while True:
+            try:
+                item = work.get_nowait()
+            except queue.Empty:
+                break
+            t0 = time.perf_counter()
+            try:
+                for i, tx_params, rx_params in item:
+                    results[i] = bench.measure_point(tx_params, rx_params)
+                    n_points += 1
+            except Exception as e:
+                # Give the unfinished item back to the other benches and retire this one
+                work.put([p for p in item if results[p[0]] is None])
+                self.err_mgr.error(f"{name}: {e}; bench removed from the run")
+                break
+            finally:
+                busy += time.perf_counter() - t0
+        stats[name] = (n_points, busy)
+
+    def run(self, points):
+        """
+        Measure a list of (tx_params, rx_params) points across all benches.
+
+        Returns the IIP3Result list in plan order (None for failed points).
+        """
+        if not self.benches:
+            self.err_mgr.error("No bench available")
+            return [None] * len(points)
+
+        # One work item per run of consecutive points at the same frequency
+        work = queue.Queue()
+        indexed = [(i, tx, rx) for i, (tx, rx) in enumerate(points)]
+        for _, item in groupby(indexed, key=lambda p: p[1].f_rf):
+            work.put(list(item))
+
+        results = [None] * len(points)
+        stats = {}
+        threads = [
+            threading.Thread(target=self._worker, args=(name, bench, work, results, stats), daemon=True)
+            for name, bench in self.benches
+        ]
+        t_start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        wall = time.perf_counter() - t_start
+
+        summary = ", ".join(f"{name}: {n} pts" for name, (n, _) in stats.items())
+        self.err_mgr.info(
+            f"Orchestrator: {len(points)} points on {len(self.benches)} benches in {wall:.2f} s "
+            f"({len(points) / max(wall, 1e-9):.1f} points/s; {summary})"
+        )
+        if not work.empty():
+            self.err_mgr.error(f"Plan unfinished: {work.qsize()} work items left after bench failures")
+        return results
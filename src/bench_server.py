@@ -0,0 +1,288 @@
+import asyncio
+import json
+import socket
+import struct
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from src.param import TxParams, RxParams
+
+
+# Frame layout (both directions): 4-byte big-endian header length, JSON header,
+# then the raw bytes of every array listed in header["arrays"], in order.
+_LEN = struct.Struct(">I")
+
+
+def _pack(header, arrays=()):
+    # Encode a frame; arrays is a sequence of (name, ndarray)
+    blobs = []
+    header = dict(header)
+    header["arrays"] = []
+    for name, arr in arrays:
+        arr = np.ascontiguousarray(arr)
+        header["arrays"].append(
+            {"name": name, "dtype": arr.dtype.str, "shape": list(arr.shape), "nbytes": arr.nbytes}
+        )
+        blobs.append(memoryview(arr).cast("B"))
+    head = json.dumps(header).encode("utf-8")
+    return [_LEN.pack(len(head)), head, *blobs]
+
+
+def _unpack_arrays(header, payload):
+    # Zero-copy views of the arrays carried by a frame payload
+    arrays = {}
+    pos = 0
+    for desc in header.get("arrays", []):
+        n = desc["nbytes"]
+        arrays[desc["name"]] = np.frombuffer(
+            payload, dtype=np.dtype(desc["dtype"]), count=n // np.dtype(desc["dtype"]).itemsize, offset=pos
+        ).reshape(desc["shape"])
+        pos += n
+    return arrays
+
+
+class BenchServer:
+    """
+    Local asyncio server giving several client processes shared access to one IIP3Bench.
+
+    The server is the only owner of the Pluto devices. Every hardware call runs
+    on a single worker thread, under one lock, so requests from different
+    clients never interleave on the devices. Identical requests that arrive
+    while one is already in flight (same operation and parameters) are
+    coalesced: they wait on the same measurement and all get its result.
+
+    Operations: configure, send_tx, receive_rx, measure (measure_point) and
+    sweep (frequency_sweep). Array results are sent back as raw NumPy buffers
+    after a JSON header; see BenchClient.
+    """
+
+    def __init__(self, bench, host="127.0.0.1", port=5560):
+        self.bench = bench
+        self.host = host
+        self.port = port
+        self.n_requests = 0
+        self.n_coalesced = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bench-hw")
+        self._hw_lock = None
+        self._inflight = {}     # request key -> future shared by identical requests
+        self._server = None
+
+    # --- hardware operations (run on the worker thread) ---
+
+    def _op_configure(self, req):
+        self.bench.configure(TxParams(**req["tx"]), RxParams(**req["rx"]))
+        return {}, []
+
+    def _op_send_tx(self, req):
+        out = self.bench.send_tx(TxParams(**req["tx"]))
+        if out is None or out[0] is None:
+            raise RuntimeError("send_tx failed")
+        freq_abs, _, P_dBm, _ = out
+        return {}, [("freq", freq_abs), ("spec_dbm", P_dBm)]
+
+    def _op_receive_rx(self, req):
+        samples = self.bench.receive_rx(RxParams(**req["rx"]))
+        if samples is None:
+            raise RuntimeError("receive_rx failed")
+        return {}, [("samples", samples)]
+
+    def _op_measure(self, req):
+        result = self.bench.measure_point(
+            TxParams(**req["tx"]), RxParams(**req["rx"]), use_cache=req.get("use_cache", True)
+        )
+        if result is None:
+            raise RuntimeError("measurement failed")
+        meta = {
+            "iip3_dbm": result.iip3_dbm,
+            "delta_db": result.delta_db,
+            "p1_avg_dbm": result.p1_avg_dbm,
+            "p1_rx_dbm": result.p1_rx_dbm,
+        }
+        arrays = [
+            ("freq_rx", np.asarray(result.freq_rx)),
+            ("spec_rx", np.asarray(result.spec_rx)),
+            ("freq_tx", np.asarray(result.freq_tx, dtype=np.float64)),
+            ("spec_tx", np.asarray(result.spec_tx, dtype=np.float64)),
+        ]
+        return meta, arrays
+
+    def _op_sweep(self, req):
+        results = self.bench.frequency_sweep(
+            TxParams(**req["tx"]), RxParams(**req["rx"]), req["freqs"],
+            use_fastlock=req.get("use_fastlock", True),
+        )
+        if any(samples is None for _, samples in results):
+            raise RuntimeError("capture failed during sweep")
+        freqs = np.array([f for f, _ in results], dtype=np.float64)
+        return {}, [("f_rf", freqs), ("samples", np.stack([s for _, s in results]))]
+
+    # --- request handling ---
+
+    async def _run_hw(self, req):
+        # Serialize hardware access: one operation at a time on the worker thread
+        handler = getattr(self, "_op_" + req["op"], None)
+        if handler is None:
+            raise ValueError(f"Unknown operation: {req['op']}")
+        async with self._hw_lock:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, handler, req)
+
+    async def _dispatch(self, req):
+        # Coalesce identical in-flight requests onto one hardware operation
+        self.n_requests += 1
+        key = json.dumps({k: v for k, v in req.items() if k != "id"}, sort_keys=True)
+        fut = self._inflight.get(key)
+        if fut is not None:
+            self.n_coalesced += 1
+            return await asyncio.shield(fut)
+        fut = asyncio.ensure_future(self._run_hw(req))
+        self._inflight[key] = fut
+        try:
+            return await asyncio.shield(fut)
+        finally:
+            if fut.done():
+                self._inflight.pop(key, None)
+            else:
+                fut.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+    async def _reply(self, writer, write_lock, req):
+        header = {"id": req.get("id")}
+        try:
+            meta, arrays = await self._dispatch(req)
+            header.update(ok=True, meta=meta)
+        except Exception as e:
+            header.update(ok=False, error=str(e))
+            arrays = []
+        async with write_lock:
+            writer.writelines(_pack(header, arrays))
+            await writer.drain()
+
+    async def _handle_client(self, reader, writer):
+        # Requests of one connection are served concurrently; replies carry the request id
+        write_lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                head_len = _LEN.unpack(await reader.readexactly(_LEN.size))[0]
+                req = json.loads(await reader.readexactly(head_len))
+                task = asyncio.create_task(self._reply(writer, write_lock, req))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for task in list(tasks):
+                task.cancel()
+            writer.close()
+
+    async def serve(self):
+        # Run the server until cancelled
+        self._hw_lock = asyncio.Lock()
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self.bench.err_mgr.info(f"Bench server listening on {self.host}:{self.port}")
+        async with self._server:
+            await self._server.serve_forever()
+
+    def run(self):
+        # Blocking entry point
+        try:
+            asyncio.run(self.serve())
+        finally:
+            self._executor.shutdown(wait=True)
+
+
+class BenchClient:
+    """
+    Blocking client of a BenchServer, for the GUI, the calibration tool or scripts.
+
+    Each call sends one request and returns (meta, arrays), where arrays is a
+    dict of NumPy arrays read directly from the reply payload. Failures on the
+    server side raise RuntimeError.
+    """
+
+    def __init__(self, host="127.0.0.1", port=5560, timeout=60.0):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self._next_id = 0
+
+    def _recv_exactly(self, n):
+        buf = bytearray(n)
+        view = memoryview(buf)
+        pos = 0
+        while pos < n:
+            k = self.sock.recv_into(view[pos:])
+            if k == 0:
+                raise ConnectionError("Bench server closed the connection")
+            pos += k
+        return buf
+
+    def request(self, op, **kwargs):
+        self._next_id += 1
+        head = json.dumps({"id": self._next_id, "op": op, **kwargs}).encode("utf-8")
+        self.sock.sendall(_LEN.pack(len(head)) + head)
+
+        header = json.loads(self._recv_exactly(_LEN.unpack(self._recv_exactly(_LEN.size))[0]))
+        payload = self._recv_exactly(sum(d["nbytes"] for d in header["arrays"]))
+        if not header["ok"]:
+            raise RuntimeError(f"Bench server: {header['error']}")
+        return header["meta"], _unpack_arrays(header, payload)
+
+    @staticmethod
+    def _params(p):
+        return None if p is None else vars(p).copy()
+
+    def configure(self, tx_params, rx_params):
+        self.request("configure", tx=self._params(tx_params), rx=self._params(rx_params))
+
+    def send_tx(self, tx_params):
+        _, arrays = self.request("send_tx", tx=self._params(tx_params))
+        return arrays["freq"], arrays["spec_dbm"]
+
+    def receive_rx(self, rx_params):
+        _, arrays = self.request("receive_rx", rx=self._params(rx_params))
+        return arrays["samples"]
+
+    def measure(self, tx_params, rx_params, use_cache=True):
+        return self.request(
+            "measure", tx=self._params(tx_params), rx=self._params(rx_params), use_cache=use_cache
+        )
+
+    def sweep(self, tx_params, rx_params, freqs, use_fastlock=True):
+        _, arrays = self.request(
+            "sweep", tx=self._params(tx_params), rx=self._params(rx_params),
+            freqs=[float(f) for f in freqs], use_fastlock=use_fastlock,
+        )
+        return arrays["f_rf"], arrays["samples"]
+
+    def close(self):
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+if __name__ == "__main__":
+    # Serve the default bench (TX/RX Plutos at 192.168.2.1), or a simulated one with --sim
+    import sys
+    from src.error_manager import ErrorManager
+    from src.iip3_bench import IIP3Bench
+    from src.pluto_rx_interface import PlutoRxInterface
+    from src.pluto_tx_interface import PlutoTxInterface
+    from src.signal_utils import SignalUtils
+    from src.Tx_calibration import TxCalibration
+
+    if "--sim" in sys.argv:
+        from src.pluto_sim import SimulatedPluto
+        tx_sdr = SimulatedPluto()
+        tx_iface = PlutoTxInterface(None, sdr=tx_sdr)
+        rx_iface = PlutoRxInterface(None, sdr=SimulatedPluto(source=tx_sdr))
+    else:
+        tx_iface = PlutoTxInterface("ip:192.168.2.1")
+        rx_iface = PlutoRxInterface("ip:192.168.2.1")
+    calib = TxCalibration("Data_Calibration_tx/plutot_tx_charac.csv")
+    bench = IIP3Bench(tx_iface, rx_iface, SignalUtils(), ErrorManager(), calib)
+    BenchServer(bench).run()
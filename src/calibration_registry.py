@@ -0,0 +1,148 @@
+import datetime
+import hashlib
+import json
+import os
+import struct
+
+import numpy as np
+
+from src.Tx_calibration import TxCalibration
+
+
+# Bundle layout:
+#   MAGIC (8 bytes) | version u16 | reserved u16 | index length u32 (little-endian)
+#   JSON index | float64 blocks
+# Each index entry gives the device block offset (relative to the end of the
+# index), its grid shape and the sha256 of the block bytes.
+MAGIC = b"IP3CALB\0"
+VERSION = 1
+_PREAMBLE = struct.Struct("<8sHHI")
+
+# Default bundle location, next to the abacus CSVs
+CALIB_BUNDLE_PATH = "Data_Calibration_tx/tx_calibration.bundle"
+
+
+def compile_bundle(entries, path=CALIB_BUNDLE_PATH):
+    """
+    Compile abacus CSVs into one indexed binary bundle.
+
+    entries: dict Pluto serial number -> CSV path. The unit name (CSV stem
+    without '_tx_charac') and the CSV content hash are kept in the index, so a
+    calibration loaded from the bundle has the same content_hash as the CSV.
+    Returns the index written.
+    """
+    blocks = []
+    devices = {}
+    offset = 0
+    for serial, csv_path in entries.items():
+        calib = TxCalibration(csv_path)
+        freqs = np.asarray(calib.freqs, dtype="<f8")
+        powers = np.asarray(calib.powers, dtype="<f8")
+        grid = np.asarray(calib.grid, dtype="<f8")
+        block = freqs.tobytes() + powers.tobytes() + grid.tobytes()
+        name = os.path.splitext(os.path.basename(csv_path))[0].removesuffix("_tx_charac")
+        devices[serial] = {
+            "name": name,
+            "source": csv_path,
+            "content_hash": calib.content_hash,
+            "n_freqs": len(freqs),
+            "n_powers": len(powers),
+            "offset": offset,
+            "nbytes": len(block),
+            "sha256": hashlib.sha256(block).hexdigest(),
+        }
+        blocks.append(block)
+        offset += len(block)
+
+    index = {
+        "version": VERSION,
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "devices": devices,
+    }
+    head = json.dumps(index, indent=1).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, VERSION, 0, len(head)))
+        f.write(head)
+        for block in blocks:
+            f.write(block)
+    return index
+
+
+class CalibrationRegistry:
+    """
+    Read access to a calibration bundle written by compile_bundle.
+
+    Opening the registry only reads the index. The grid of a device is read
+    (and checked against its sha256) on the first load() of its serial number,
+    then kept in memory.
+    """
+
+    def __init__(self, path=CALIB_BUNDLE_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, version, _, head_len = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path}: not a calibration bundle")
+            if version > VERSION:
+                raise ValueError(f"{path}: unsupported bundle version {version}")
+            self.index = json.loads(f.read(head_len))
+        self._data_start = _PREAMBLE.size + head_len
+        self.created = self.index["created"]
+        self._loaded = {}
+
+    def serials(self):
+        return list(self.index["devices"])
+
+    def info(self, serial):
+        # Index entry of a device, or None if the bundle has no calibration for it
+        return self.index["devices"].get(serial)
+
+    def find(self, key):
+        # Serial number matching a serial or a unit name (e.g. "plutot"), or None
+        devices = self.index["devices"]
+        if key in devices:
+            return key
+        for serial, entry in devices.items():
+            if entry["name"] == key:
+                return serial
+        return None
+
+    def load(self, serial):
+        # TxCalibration of a device; raises KeyError if the serial is not in the bundle
+        if serial in self._loaded:
+            return self._loaded[serial]
+        entry = self.index["devices"][serial]
+        with open(self.path, "rb") as f:
+            f.seek(self._data_start + entry["offset"])
+            block = f.read(entry["nbytes"])
+        if hashlib.sha256(block).hexdigest() != entry["sha256"]:
+            raise ValueError(f"{self.path}: corrupted calibration block for {serial}")
+
+        n_f, n_p = entry["n_freqs"], entry["n_powers"]
+        values = np.frombuffer(block, dtype="<f8")
+        calib = TxCalibration.from_arrays(
+            values[:n_f],
+            values[n_f:n_f + n_p],
+            values[n_f + n_p:].reshape(n_f, n_p),
+            source=f"{self.path}:{entry['name']}",
+            content_hash=entry["content_hash"],
+        )
+        self._loaded[serial] = calib
+        return calib
+
+
+if __name__ == "__main__":
+    # Usage: python -m src.calibration_registry [bundle] SERIAL=csv_path [SERIAL=csv_path ...]
+    import sys
+
+    args = sys.argv[1:]
+    out = CALIB_BUNDLE_PATH
+    if args and "=" not in args[0]:
+        out = args.pop(0)
+    entries = dict(arg.split("=", 1) for arg in args)
+    if not entries:
+        sys.exit("usage: python -m src.calibration_registry [bundle] SERIAL=csv_path ...")
+    index = compile_bundle(entries, out)
+    for serial, entry in index["devices"].items():
+        print(f"{serial}: {entry['name']} ({entry['n_freqs']} x {entry['n_powers']}) from {entry['source']}")
+    print(f"Bundle written to {out} ({index['created']})")
@@ -1,4 +1,5 @@
 from src.iip3_bench import *
+import numpy as np
 # Import IIP3-related types (e.g., TxParams, RxParams) used in configuration utilities
 
 PLUTO_TX_IP = "ip:192.168.2.10"
@@ -36,8 +37,117 @@ def validate_params(Tx_params, rx_params, pluto_spec) :
     """
     Validate TX and RX parameters against the Pluto specification.
 
-    This function is intended to check that frequencies, sample rates,
-    TX power and RX gain are within the limits given by 'pluto_spec'.
-    Currently not implemented.
+    Checks that frequencies, sample rates, TX power and RX gain are within
+    the limits given by 'pluto_spec', and that the IM3 products fall inside
+    the RX band. Raises ValueError listing every violated limit.
     """
-    pass
\ No newline at end of file
+    plan = {
+        "f_rf": Tx_params.f_rf,
+        "fs": Tx_params.fs,
+        "pe_dbm": Tx_params.pe_dbm,
+        "delta_f": Tx_params.delta_f,
+        "g_rx_db": rx_params.g_rx_db,
+    }
+    _, report = validate_sweep_plan(plan, pluto_spec, mode="reject")
+    if report["n_rejected"]:
+        raise ValueError("Invalid parameters: " + ", ".join(report["reasons"]))
+    if rx_params.f_rf != Tx_params.f_rf or rx_params.fs != Tx_params.fs:
+        raise ValueError("Invalid parameters: TX and RX f_rf/fs differ")
+
+def plan_arrays(points):
+    """
+    Convert a list of (TxParams, RxParams) points into the array form used by
+    validate_sweep_plan.
+    """
+    return {
+        "f_rf": np.array([tx.f_rf for tx, _ in points], dtype=np.float64),
+        "fs": np.array([tx.fs for tx, _ in points], dtype=np.float64),
+        "pe_dbm": np.array([tx.pe_dbm for tx, _ in points], dtype=np.float64),
+        "delta_f": np.array([tx.delta_f for tx, _ in points], dtype=np.float64),
+        "g_rx_db": np.array([rx.g_rx_db for _, rx in points], dtype=np.float64),
+    }
+
+def validate_sweep_plan(plan, pluto_spec=None, calib=None, mode="reject"):
+    """
+    Check every point of a sweep plan in one vectorized pass.
+
+    'plan' is a dict of equal-length (or broadcastable) arrays: f_rf, fs,
+    pe_dbm, delta_f and g_rx_db (see plan_arrays). Each point is checked
+    against the Pluto limits, the IM3 products must lie inside the RX band
+    (3*delta_f < fs) and, when 'calib' is given, the point must be covered by
+    the abacus with a corrected TX power <= 0 dBm.
+
+    mode="reject" drops failing points; mode="clip" first moves frequency,
+    sample rate, power and gain into their limits (and lowers the power by
+    any positive corrected excess), then drops what still fails.
+
+    Returns (valid_plan, report): valid_plan holds the kept points plus their
+    original 'index'; report gives the point counts and, for each failed
+    check, the indices of the offending points.
+    """
+    if mode not in ("reject", "clip"):
+        raise ValueError(f"Unknown validation mode: {mode}")
+    if pluto_spec is None:
+        pluto_spec = load_pluto_spec()
+
+    keys = ("f_rf", "fs", "pe_dbm", "delta_f", "g_rx_db")
+    arrays = np.broadcast_arrays(*(np.asarray(plan[k], dtype=np.float64) for k in keys))
+    p = {k: np.array(a, ndmin=1) for k, a in zip(keys, arrays)}
+    n = len(p["f_rf"])
+    original = {k: v.copy() for k, v in p.items()}
+
+    limits = {
+        "f_rf": (pluto_spec["f_min"], pluto_spec["f_max"]),
+        "fs": (pluto_spec["fs_min"], pluto_spec["fs_max"]),
+        "pe_dbm": (pluto_spec["pe_min"], pluto_spec["pe_max"]),
+        "g_rx_db": (pluto_spec["g_rx_min"], pluto_spec["g_rx_max"]),
+    }
+    if calib is not None and mode == "clip":
+        # Calibration coverage narrows the usable frequency and power ranges
+        f_lo, f_hi = limits["f_rf"]
+        limits["f_rf"] = (max(f_lo, calib.freqs[0]), min(f_hi, calib.freqs[-1]))
+        p_lo, p_hi = limits["pe_dbm"]
+        limits["pe_dbm"] = (max(p_lo, calib.powers[0]), min(p_hi, calib.powers[-1]))
+
+    if mode == "clip":
+        for k, (lo, hi) in limits.items():
+            np.clip(p[k], lo, hi, out=p[k])
+
+    failed = {}
+    for k, (lo, hi) in limits.items():
+        failed[f"{k} outside [{lo:g}, {hi:g}]"] = (p[k] < lo) | (p[k] > hi)
+    failed["IM3 outside RX band (3*delta_f >= fs)"] = 3 * p["delta_f"] >= p["fs"]
+
+    if calib is not None:
+        corr_db, in_range = calib.get_correction_array(p["f_rf"], p["pe_dbm"])
+        pe_corr = p["pe_dbm"] + corr_db
+        if mode == "clip":
+            # Lower the commanded power by the excess, then re-check on the new grid point
+            for _ in range(4):
+                excess = np.maximum(pe_corr, 0.0)
+                if not excess.any():
+                    break
+                p["pe_dbm"] = np.maximum(p["pe_dbm"] - excess, limits["pe_dbm"][0])
+                corr_db, in_range = calib.get_correction_array(p["f_rf"], p["pe_dbm"])
+                pe_corr = p["pe_dbm"] + corr_db
+        failed["outside calibration abacus"] = ~in_range
+        failed["corrected TX power > 0 dBm"] = in_range & (pe_corr > 0)
+
+    bad = np.zeros(n, dtype=bool)
+    for mask in failed.values():
+        bad |= mask
+    changed = np.zeros(n, dtype=bool)
+    for k in keys:
+        changed |= p[k] != original[k]
+
+    keep = np.flatnonzero(~bad)
+    valid_plan = {k: v[keep] for k, v in p.items()}
+    valid_plan["index"] = keep
+    report = {
+        "n_points": n,
+        "n_valid": len(keep),
+        "n_rejected": int(bad.sum()),
+        "n_clipped": int((changed & ~bad).sum()),
+        "reasons": {reason: np.flatnonzero(mask) for reason, mask in failed.items() if mask.any()},
+    }
+    return valid_plan, report
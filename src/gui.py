@@ -12,6 +12,8 @@ from src.pluto_rx_interface import PlutoRxInterface
 from src.signal_utils import SignalUtils
 from src.error_manager import ErrorManager
 from src.Tx_calibration import TxCalibration
+from src.calibration_registry import CalibrationRegistry, CALIB_BUNDLE_PATH
+import os
 import subprocess
 import re
 
@@ -59,8 +61,13 @@ class MainWindow(tk.Tk):
         self.tx_iface = PlutoTxInterface("ip:192.168.2.1")
         self.rx_iface = PlutoRxInterface("ip:192.168.2.1")
         self.calib_path = tk.StringVar(value="Data_Calibration_tx/plutot_tx_charac.csv")
-        calib = TxCalibration(self.calib_path.get())
+        # Device names shown in the calibration field -> serial number in the bundle
+        self.calib_bundle_keys = {}
+        # With a calibration bundle the device calibration is selected once logging is up
+        calib = None if os.path.exists(CALIB_BUNDLE_PATH) else TxCalibration(self.calib_path.get())
         self.bench = IIP3Bench(self.tx_iface, self.rx_iface, sig_utils, self.err_mgr, calib)
+        # TX parameters of the waveform currently running (set by a successful 'Send TX')
+        self.tx_running = None
 
         # --- window configuration ---
         self.title("IIP3 bench – Pluto")
@@ -85,6 +92,8 @@ class MainWindow(tk.Tk):
         ttk.Label(frame_calib, text="Calibration CSV:").pack(anchor="w")
         self.entry_calib = ttk.Entry(frame_calib, textvariable=self.calib_path)
         self.entry_calib.pack(fill="x")
+        # Enter reloads the calibration named in the field (bundle device name or CSV path)
+        self.entry_calib.bind("<Return>", lambda event: self._reload_calibration())
 
         ttk.Button(
             frame_calib,
@@ -108,6 +117,22 @@ class MainWindow(tk.Tk):
         self.entry_pe.insert(0, str(self.pe))
         self.entry_pe.pack(fill="x")
 
+        # RX gain auto-ranging (otherwise fixed gain); only used while the TX is running
+        self.auto_rx_gain = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            frame_measure,
+            text="Auto RX gain",
+            variable=self.auto_rx_gain
+        ).pack(anchor="w")
+
+        # Adaptive capture length (n_sample becomes the cap)
+        self.adaptive_capture = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            frame_measure,
+            text="Adaptive capture",
+            variable=self.adaptive_capture
+        ).pack(anchor="w")
+
         # Buttons to trigger TX and RX operations
         ttk.Button(
             frame_measure,
@@ -192,6 +217,33 @@ class MainWindow(tk.Tk):
         # Now that Log exists, connect ErrorManager to GUI logging
         self.err_mgr.set_log_callback(self.log.write)
         self._report_pluto_status()
+        if self.bench.calib is None:
+            self._select_calibration_from_bundle()
+
+    def _select_calibration_from_bundle(self):
+        # Use the TX Pluto's calibration from the bundle, falling back to the default CSV
+        try:
+            registry = CalibrationRegistry(CALIB_BUNDLE_PATH)
+            selected = self.bench.select_calibration(registry)
+        except (OSError, ValueError) as e:
+            self.err_mgr.error(f"Calibration bundle unusable: {e}")
+            selected = False
+        if selected:
+            # Show the device name; the bundle serial stays internal
+            serial = self.bench.tx_iface.serial_number()
+            name = registry.info(serial)["name"]
+            self.calib_bundle_keys[name] = serial
+            self.calib_path.set(name)
+        else:
+            self.bench.set_calibration(self._load_calibration(self.calib_path.get()))
+            self.err_mgr.info(f"Loaded TX calibration from: {self.calib_path.get()}")
+
+    def _load_calibration(self, value):
+        # TxCalibration for the calibration field: a device name from the bundle or a CSV path
+        serial = self.calib_bundle_keys.get(value)
+        if serial is not None:
+            return CalibrationRegistry(CALIB_BUNDLE_PATH).load(serial)
+        return TxCalibration(value)
 
     def _browse_calib_file(self):
         # Let user choose a CSV file for TX calibration
@@ -202,10 +254,18 @@ class MainWindow(tk.Tk):
         if not filename:
             return
         self.calib_path.set(filename)
-        # Reload calibration and update bench
-        calib = TxCalibration(filename)
+        self._reload_calibration()
+
+    def _reload_calibration(self):
+        # Reload the calibration named in the field and update bench
+        value = self.calib_path.get()
+        try:
+            calib = self._load_calibration(value)
+        except (OSError, ValueError, KeyError) as e:
+            self.err_mgr.error(f"Cannot load TX calibration '{value}': {e}")
+            return
         self.bench.set_calibration(calib)
-        self.err_mgr.info(f"Loaded TX calibration from: {filename}")
+        self.err_mgr.info(f"Loaded TX calibration from: {value}")
         
     def _report_pluto_status(self):
         # Check TX/RX connectivity and report status in the log
@@ -268,11 +328,13 @@ class MainWindow(tk.Tk):
 
         tx, rx, p_ton_meas, p_imd3_meas = self._read_params()
         self.bench.configure(tx, rx)
+        self.tx_running = None
         freq_abs, P_bin, P_dBm, A_sample = self.bench.send_tx(tx)
 
         if freq_abs is None:
             # Early exit if TX sending failed (e.g., calibration issue)
             return
+        self.tx_running = tx
 
         # Update TX plot with new spectrum
         self.ax_tx.clear()
@@ -289,7 +351,37 @@ class MainWindow(tk.Tk):
             return
 
         tx, rx, p_ton_meas, p_imd3_meas = self._read_params()
+        if self.auto_rx_gain.get():
+            running = self.tx_running
+            if running is None or (running.f_rf, running.pe_dbm) != (tx.f_rf, tx.pe_dbm):
+                # Probing without the matching stimulus would pick (and cache) a wrong gain
+                self.err_mgr.warning(
+                    "Auto RX gain needs a running TX at these settings: click 'Send TX' first. "
+                    "Fixed RX gain used."
+                )
+            else:
+                # Replace the fixed RX gain by the auto-ranged (cached) one
+                rx.g_rx_db = self.bench.auto_range_rx_gain(rx, tx.pe_dbm)
         self.bench.configure(tx, rx)
+
+        if self.adaptive_capture.get():
+            # Capture until tone and IM3 levels reach the target uncertainty
+            result = self.bench.receive_rx_adaptive(rx, tx.delta_f)
+            if result is None:
+                return
+            freq_abs, P_dBm, levels, uncertainty_db = result
+            p_tone_pos, p_tone_neg, p_im3_pos, p_im3_neg = levels
+            self.err_mgr.info(f"Measured tone levels: {p_tone_pos:.2f} , {p_tone_neg:.2f}")
+            self.err_mgr.info(f"Measured IMD3 levels: {p_im3_pos:.2f} , {p_im3_neg:.2f}")
+
+            self.ax_rx.clear()
+            self.ax_rx.plot(freq_abs, P_dBm)
+            self.ax_rx.set_xlabel("Hz")
+            self.ax_rx.set_ylabel("dBm")
+            self.ax_rx.grid(True)
+            self.canvas_rx.draw()
+            return
+
         rx_samples = self.bench.receive_rx(rx)
 
         if rx_samples is None:
@@ -297,7 +389,11 @@ class MainWindow(tk.Tk):
             return
 
         # Compute FFT of received samples and update RX plot
-        freq_abs, P_bin, P_dBm, A_sample = self.bench.signal_utils.compute_fft(rx_samples, rx.fs, rx.f_rf)
+        # Reuse the RX spectrum workspace across captures of the same shape
+        workspace = self.bench.signal_utils.get_workspace(len(rx_samples), rx.fs, rx.f_rf)
+        freq_abs, P_bin, P_dBm, A_sample = self.bench.signal_utils.compute_fft(
+            rx_samples, rx.fs, rx.f_rf, workspace=workspace
+        )
         
         p_tone_pos, p_tone_neg, p_im3_pos, p_im3_neg = self.bench.signal_utils.search_peak_in_band(
             freq_abs,
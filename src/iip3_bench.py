@@ -2,9 +2,14 @@ from src.pluto_tx_interface import *
 from src.pluto_rx_interface import *
 from src.signal_utils import *
 from src.param import *
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+import math
+import time
+import numpy as np
 from src.error_manager import ErrorManager
 from src.Tx_calibration import TxCalibration
+from src.result_cache import ResultCache
+from src.results_db import ResultsDatabase
 
 
 class IIP3Bench:
@@ -15,6 +20,15 @@ class IIP3Bench:
         self.signal_utils = signal_utils
         self.err_mgr = err_mgr
         self.calib = calib
+        # RX gain chosen by auto-ranging, keyed by (f_rf, pe_dbm)
+        self.rx_gain_cache = {}
+        # Closed-loop TX corrections (dB), keyed by (f_rf, pe_dbm)
+        self.tx_level_cache = {}
+        # Optional memoization of measure_point() results and DUT identifier
+        self.result_cache: ResultCache = None
+        self.dut_id = None
+        # Optional persistent store of measure_point() results
+        self.results_db: ResultsDatabase = None
         # Store last-used TX/RX parameters for subsequent operations
         self.current_tx_params: TxParams
         self.current_rx_params: RxParams
@@ -24,8 +38,44 @@ class IIP3Bench:
         # Update the calibration table used for TX power correction
         self.calib = calib
 
+    def select_calibration(self, registry):
+        # Pick the TX calibration of the connected Pluto from a CalibrationRegistry
+        """
+        Looks up the TX device serial number in the registry and installs the
+        matching calibration. Returns True on success; otherwise the current
+        calibration is kept and a warning is logged.
+        """
+        serial = self.tx_iface.serial_number() if self.tx_iface is not None else None
+        if serial is None:
+            self.err_mgr.warning("TX Pluto serial number unavailable, calibration not selected")
+            return False
+        if registry.info(serial) is None:
+            self.err_mgr.warning(f"No calibration for Pluto {serial} in {registry.path}")
+            return False
+        calib = registry.load(serial)
+        self.set_calibration(calib)
+        self.err_mgr.info(
+            f"TX calibration for Pluto {serial}: {registry.info(serial)['name']} "
+            f"(bundle {registry.created})"
+        )
+        return True
+
+    def set_result_cache(self, result_cache: ResultCache):
+        # Enable (or disable with None) memoization of measure_point() results
+        self.result_cache = result_cache
+
+    def set_results_db(self, results_db: ResultsDatabase):
+        # Enable (or disable with None) recording of measure_point() results
+        self.results_db = results_db
+
     def _apply_tx_calibration(self, tx_params: TxParams) -> TxParams:
         """Return a copy of tx_params with TX power corrected using the calibration table."""
+        leveled = self.tx_level_cache.get((tx_params.f_rf, tx_params.pe_dbm))
+        if leveled is not None:
+            # Converged closed-loop correction takes precedence over the open-loop grid
+            self.err_mgr.info(f"Leveled TX correction from cache: {leveled:+.2f} dB")
+            return replace(tx_params, pe_dbm=tx_params.pe_dbm + leveled)
+
         if self.calib is None:
             # No calibration available, return original parameters
             return tx_params
@@ -59,6 +109,65 @@ class IIP3Bench:
             n_sample=tx_params.n_sample,
         )
 
+    @staticmethod
+    def _as_param_type(like, value, floor=False):
+        # Convert a validated value back to the type of the original field (ints rounded, or floored)
+        if isinstance(like, (int, np.integer)) and not isinstance(like, bool):
+            return int(math.floor(value)) if floor else int(round(value))
+        return float(value)
+
+    def validate_plan(self, points, mode="reject", pluto_spec=None):
+        # Pre-flight check of a whole list of (tx_params, rx_params) points before any hardware access
+        """
+        Runs config.validate_sweep_plan with the current calibration and logs
+        a report. Returns the list of points to measure: failing points are
+        dropped, and with mode="clip" adjusted points carry their clipped values.
+
+        Clipped values are converted back to the field types of the original
+        points (powers and gains of integer fields are rounded down), and the
+        converted points are checked again so that no kept point violates a limit.
+        """
+        from src.config import plan_arrays, validate_sweep_plan
+
+        if not points:
+            return []
+        valid, report = validate_sweep_plan(plan_arrays(points), pluto_spec, self.calib, mode=mode)
+        for reason, idx in report["reasons"].items():
+            shown = ", ".join(str(i) for i in idx[:10]) + (" ..." if len(idx) > 10 else "")
+            self.err_mgr.warning(f"Plan check: {reason}: {len(idx)} points ({shown})")
+
+        candidates = []
+        for j, i in enumerate(valid["index"]):
+            tx, rx = points[i]
+            f_rf = self._as_param_type(tx.f_rf, valid["f_rf"][j])
+            fs = self._as_param_type(tx.fs, valid["fs"][j])
+            pe_dbm = self._as_param_type(tx.pe_dbm, valid["pe_dbm"][j], floor=True)
+            g_rx_db = self._as_param_type(rx.g_rx_db, valid["g_rx_db"][j], floor=True)
+            candidates.append((
+                i,
+                replace(tx, f_rf=f_rf, fs=fs, pe_dbm=pe_dbm),
+                replace(rx, f_rf=f_rf, fs=fs, g_rx_db=g_rx_db),
+            ))
+
+        # Second pass on the converted values: type conversion must not bring a point back out of limits
+        kept = []
+        if candidates:
+            recheck, report2 = validate_sweep_plan(
+                plan_arrays([(tx, rx) for _, tx, rx in candidates]), pluto_spec, self.calib, mode="reject"
+            )
+            for reason, idx in report2["reasons"].items():
+                orig = [candidates[k][0] for k in idx]
+                shown = ", ".join(str(i) for i in orig[:10]) + (" ..." if len(orig) > 10 else "")
+                self.err_mgr.warning(f"Plan check after conversion: {reason}: {len(orig)} points ({shown})")
+            kept = [candidates[k] for k in recheck["index"]]
+
+        n_clipped = sum(1 for i, tx, rx in kept if (tx, rx) != tuple(points[i]))
+        self.err_mgr.info(
+            f"Plan check: {len(kept)}/{len(points)} points valid, "
+            f"{n_clipped} clipped, {len(points) - len(kept)} rejected"
+        )
+        return [(tx, rx) for _, tx, rx in kept]
+
     def configure(self, tx_params, rx_params):
         # Store current TX/RX parameters and configure both Pluto devices
         self.current_tx_params = tx_params
@@ -99,11 +208,38 @@ class IIP3Bench:
         self.err_mgr.info(f"Generating two-tone signal: f_rf={tx_corr.f_rf:.3e} Hz, ")
         self.err_mgr.info(f"pe_dbm={tx_corr.pe_dbm:.1f} dBm, delta_f={tx_corr.delta_f:.1e} Hz, ")
         self.err_mgr.info(f"n_sample={tx_corr.n_sample}")
-        signal_v, signal_codes = self.signal_utils.generate_two_tone_baseband(
-            pe_dbm=tx_corr.pe_dbm,
-            delta_f=tx_corr.delta_f,
-            n_sample=tx_corr.n_sample,
-        )
+        # One exact period is tiled, so n_sample may be rounded to whole periods;
+        # a period longer than the requested buffer is not accepted
+        max_period = min(tx_corr.n_sample, 2 ** 22)
+        try:
+            signal_v, signal_codes = self.signal_utils.generate_two_tone_iq(
+                pe_dbm=tx_corr.pe_dbm,
+                delta_f=tx_corr.delta_f,
+                fs=tx_corr.fs,
+                n_sample=tx_corr.n_sample,
+                max_period=max_period,
+            )
+        except ValueError as e:
+            # Spacing not commensurate with fs: snap it so one period fits in the requested buffer
+            delta_f = self.signal_utils.commensurate_spacing(tx_corr.delta_f, tx_corr.fs, max_period)
+            if abs(delta_f - tx_corr.delta_f) > 0.01 * tx_corr.delta_f:
+                self.err_mgr.error(f"{e}; no commensurate tone spacing within 1% of {tx_corr.delta_f} Hz")
+                return None, None, None, None
+            self.err_mgr.warning(f"{e}; tone spacing snapped from {tx_corr.delta_f} Hz to {delta_f} Hz")
+            tx_corr = replace(tx_corr, delta_f=delta_f)
+            try:
+                signal_v, signal_codes = self.signal_utils.generate_two_tone_iq(
+                    pe_dbm=tx_corr.pe_dbm,
+                    delta_f=tx_corr.delta_f,
+                    fs=tx_corr.fs,
+                    n_sample=tx_corr.n_sample,
+                    max_period=max_period,
+                )
+            except ValueError as e:
+                self.err_mgr.error(f"Cannot synthesize two-tone waveform: {e}")
+                return None, None, None, None
+        if len(signal_codes) != tx_corr.n_sample:
+            self.err_mgr.info(f"TX buffer rounded to {len(signal_codes)} samples (whole periods)")
 
         # 2) Send waveform to Pluto TX
         if self.tx_iface.is_connected():
@@ -123,8 +259,9 @@ class IIP3Bench:
 
         return freq_abs, P_bin, P_dBm, A_sample
 
-    def receive_rx(self, rx_params=None):
+    def receive_rx(self, rx_params=None, out=None):
         # Capture RX samples using current or provided RX parameters
+        # If 'out' is given (see PlutoRxInterface.alloc_rx_buffer), samples are written into it
         # Use previously stored RX parameters if none are given
         if rx_params is None:
             rx_params = self.current_rx_params
@@ -150,12 +287,538 @@ class IIP3Bench:
         acc_freq = None
 
         # Capture raw RX samples from Pluto
-        rx_samples = self.rx_iface.receive(n_samples=rx_params.n_sample)
+        if out is not None:
+            rx_samples = self.rx_iface.receive_into(out)
+        else:
+            rx_samples = self.rx_iface.receive(n_samples=rx_params.n_sample)
         self.err_mgr.info(
             f"RX captured: f_rf={rx_params.f_rf:.3e} Hz, fs={rx_params.fs:.3e} Hz"
         )
         return rx_samples
 
+    def frequency_sweep(self, tx_params, rx_params, freqs, use_fastlock=True):
+        # Measure a two-tone capture at each RF frequency, hopping LOs with fastlock profiles
+        """
+        Run send_tx/receive_rx at every frequency of 'freqs'.
+
+        Both LOs are retuned through tune_lo(): the first visit of a frequency
+        stores its AD9361 fastlock profile, later sweeps over the same
+        frequencies recall it instead of a full retune and recalibration.
+        Devices without fastlock fall back to software retuning.
+
+        Returns a list of (f_rf, rx_samples) tuples.
+        """
+        results = []
+        t_start = time.perf_counter()
+        for f_rf in freqs:
+            tx = replace(tx_params, f_rf=f_rf)
+            rx = replace(rx_params, f_rf=f_rf)
+
+            # Hop both LOs before configuring the rest of the signal path
+            if self.tx_iface.is_connected():
+                self.tx_iface.tune_lo(f_rf, use_fastlock=use_fastlock)
+            if self.rx_iface.is_connected():
+                self.rx_iface.tune_lo(f_rf, use_fastlock=use_fastlock)
+
+            self.configure(tx, rx)
+            self.send_tx(tx)
+            rx_samples = self.receive_rx(rx)
+            results.append((f_rf, rx_samples))
+
+        elapsed = time.perf_counter() - t_start
+        fastlock = (
+            use_fastlock
+            and self.tx_iface.is_connected() and self.tx_iface.fastlock_supported
+            and self.rx_iface.is_connected() and self.rx_iface.fastlock_supported
+        )
+        self.err_mgr.info(
+            f"Frequency sweep: {len(results)} points in {elapsed:.2f} s "
+            f"({'fastlock' if fastlock else 'software'} retune)"
+        )
+        return results
+
+    def _probe_rx_level(self, rx_params, g_rx_db, n_probe):
+        # Short capture at a given RX gain, returning (strongest tone in dBFS, clipped)
+        probe = replace(rx_params, n_sample=n_probe, g_rx_db=g_rx_db)
+        self.rx_iface.configure_rx(probe)
+        self.rx_iface.flush_buffers(n=2)
+        samples = self.rx_iface.receive(n_samples=n_probe)
+        return self.signal_utils.tone_level_dbfs(samples)
+
+    def auto_range_rx_gain(
+        self,
+        rx_params,
+        pe_dbm,
+        margin_db=10.0,
+        tol_db=3.0,
+        n_probe=4096,
+        g_min=0,
+        g_max=70,
+        verify_cached=True
+    ):
+        """
+        Find the RX gain putting the strongest tone 'margin_db' below full scale.
+
+        A binary search on rx_hardwaregain_chan0 uses short probe captures and
+        accepts a gain whose tone level lies in [-(margin_db + tol_db), -margin_db]
+        dBFS without clipping. The result is cached per (f_rf, pe_dbm): a cached
+        gain is checked with a single probe (or none if verify_cached is False)
+        before falling back to the search.
+
+        Returns the chosen gain in dB, or None if RX is not connected.
+        """
+        if not self.rx_iface.is_connected():
+            self.err_mgr.error("Pluto RX not connected")
+            return None
+
+        key = (rx_params.f_rf, pe_dbm)
+        target_hi = -margin_db
+        target_lo = -(margin_db + tol_db)
+
+        cached = self.rx_gain_cache.get(key)
+        if cached is not None:
+            if not verify_cached:
+                return cached
+            level, clipped = self._probe_rx_level(rx_params, cached, n_probe)
+            if not clipped and target_lo <= level <= target_hi:
+                self.err_mgr.info(f"RX gain from cache: {cached} dB ({level:.1f} dBFS)")
+                return cached
+
+        # Binary search: tone level grows monotonically with RX gain
+        lo, hi = g_min, g_max
+        best = g_min
+        n_probes = 0
+        while lo <= hi:
+            g = (lo + hi) // 2
+            level, clipped = self._probe_rx_level(rx_params, g, n_probe)
+            n_probes += 1
+            if clipped or level > target_hi:
+                hi = g - 1
+            else:
+                best = g
+                if level >= target_lo:
+                    break
+                lo = g + 1
+
+        self.rx_gain_cache[key] = best
+        self.err_mgr.info(f"RX gain auto-ranged to {best} dB after {n_probes} probes")
+        return best
+
+    def receive_rx_adaptive(
+        self,
+        rx_params,
+        delta_f,
+        target_db=0.5,
+        n_start=8192,
+        n_max=None,
+        max_captures=8,
+        search_bw=None
+    ):
+        """
+        Capture only as many samples as needed to reach a level uncertainty.
+
+        Starts with an n_start-sample capture, estimates the noise floor from a
+        robust percentile of the spectrum and the uncertainty of the tone and
+        IM3 levels. While the worst uncertainty exceeds target_db, the capture
+        length is doubled up to n_max (default rx_params.n_sample), then further
+        captures are averaged up to max_captures.
+
+        search_bw is the search half-width around each tone (default
+        delta_f/4, must be below delta_f).
+
+        Returns (freq_abs, P_dBm, levels, uncertainty_db) with levels =
+        (p_tone_pos, p_tone_neg, p_im3_pos, p_im3_neg) in dBm, or None if RX
+        is not connected.
+        """
+        search_bw = self._two_tone_search_bw(delta_f, search_bw)
+        if not self.rx_iface.is_connected():
+            self.err_mgr.error("Pluto RX not connected")
+            return None
+        if n_max is None:
+            n_max = rx_params.n_sample
+
+        n = min(n_start, n_max)
+        acc = None
+        n_avg = 0
+        n_total = 0
+        while True:
+            if acc is None:
+                # New capture length: reconfigure and flush once
+                self.rx_iface.configure_rx(replace(rx_params, n_sample=n))
+                self.rx_iface.flush_buffers(n=2)
+            samples = self.rx_iface.receive(n_samples=n)
+            n_total += n
+            freq_abs, P_bin, P_dBm, A_sample = self.signal_utils.compute_fft(
+                samples, rx_params.fs, rx_params.f_rf
+            )
+
+            # Average power spectra of captures with the same length
+            if acc is None:
+                acc = P_bin
+            else:
+                acc += P_bin
+            n_avg += 1
+            P_avg = acc / n_avg
+            P_dBm = 10 * np.log10(np.maximum(P_avg, 1e-20))
+
+            levels = self.signal_utils.search_peak_in_band(
+                freq_abs, P_dBm, rx_params.f_rf, delta_f / 2, 3 * delta_f / 2, search_bw=search_bw
+            )
+            p_noise = self.signal_utils.estimate_noise_floor(P_avg)
+            unc = self.signal_utils.level_uncertainty_db(
+                10 ** (np.asarray(levels) / 10), p_noise, n_avg
+            )
+            uncertainty_db = float(np.max(unc))
+            if uncertainty_db <= target_db:
+                break
+
+            if n < n_max:
+                # Longer capture: noise per bin drops while tone power stays
+                n = min(2 * n, n_max)
+                acc = None
+                n_avg = 0
+            elif n_avg < max_captures:
+                continue
+            else:
+                self.err_mgr.warning(
+                    f"Adaptive capture: target {target_db:.2f} dB not reached "
+                    f"({uncertainty_db:.2f} dB at cap)"
+                )
+                break
+
+        self.err_mgr.info(
+            f"Adaptive capture: {n} samples x {n_avg} averages ({n_total} total), "
+            f"uncertainty {uncertainty_db:.2f} dB"
+        )
+        return freq_abs, P_dBm, levels, uncertainty_db
+
+    def level_tx_power(
+        self,
+        tx_params,
+        rx_params,
+        rx_offset_db,
+        tol_db=0.05,
+        max_iter=6,
+        max_step_db=3.0,
+        pluto_spec=None,
+        search_bw=None
+    ):
+        """
+        Closed-loop TX leveling of the per-tone power to tx_params.pe_dbm.
+
+        Starts from the open-loop calibration, measures the fundamental with
+        the RX path and applies Newton corrections, using the local slope of
+        the TxCalibration grid as derivative (1 dB/dB without calibration).
+        The RX level is referred to the TX output as
+        P = P_rx_dBm - g_rx_db + rx_offset_db, where rx_offset_db is the
+        calibrated RX path offset (dB from the ADC-referenced reading at 0 dB
+        gain to the TX output power, measured once against the analyzer).
+        There is no default: without it the loop compares ADC-referenced
+        levels with a dBm target and cannot converge.
+
+        Each step is limited to ±max_step_db and the command is kept within
+        the pluto_spec power range [pe_min, pe_max] (config.load_pluto_spec by
+        default). search_bw is the tone search half-width (default delta_f/4).
+
+        The converged correction is cached per (f_rf, pe_dbm) and reused by
+        _apply_tx_calibration, so repeated points need no extra iteration.
+
+        Returns (corr_db, n_iter), or (None, n_iter) if leveling failed.
+        """
+        from src.config import load_pluto_spec
+
+        if rx_offset_db is None:
+            raise ValueError("level_tx_power needs a calibrated rx_offset_db")
+        search_bw = self._two_tone_search_bw(tx_params.delta_f, search_bw)
+        if pluto_spec is None:
+            pluto_spec = load_pluto_spec()
+        pe_min, pe_max = pluto_spec["pe_min"], pluto_spec["pe_max"]
+
+        key = (tx_params.f_rf, tx_params.pe_dbm)
+        if key in self.tx_level_cache:
+            return self.tx_level_cache[key], 0
+        if not self.tx_iface.is_connected() or not self.rx_iface.is_connected():
+            self.err_mgr.error("TX leveling needs both Pluto TX and RX connected")
+            return None, 0
+
+        # Open-loop start: waveform loaded once, iterations only change the TX gain
+        if self.send_tx(tx_params)[0] is None:
+            return None, 0
+        target = tx_params.pe_dbm
+        pe_cmd = self._apply_tx_calibration(tx_params).pe_dbm
+
+        for n_iter in range(1, max_iter + 1):
+            rx_samples = self.receive_rx(rx_params)
+            if rx_samples is None:
+                return None, n_iter
+            freq_abs, P_bin, P_dBm, A_sample = self.signal_utils.compute_fft(
+                rx_samples, rx_params.fs, rx_params.f_rf
+            )
+            p_tone_pos, p_tone_neg, _, _ = self.signal_utils.search_peak_in_band(
+                freq_abs, P_dBm, rx_params.f_rf, tx_params.delta_f / 2,
+                3 * tx_params.delta_f / 2, search_bw=search_bw
+            )
+            p_meas = 0.5 * (p_tone_pos + p_tone_neg) - rx_params.g_rx_db + rx_offset_db
+            err = target - p_meas
+            self.err_mgr.info(
+                f"TX leveling iter {n_iter}: P_cmd={pe_cmd:.2f} dBm, P_meas={p_meas:.2f} dBm"
+            )
+            if abs(err) <= tol_db:
+                corr_db = pe_cmd - target
+                self.tx_level_cache[key] = corr_db
+                self.err_mgr.info(f"TX leveled in {n_iter} iterations: correction={corr_db:+.2f} dB")
+                return corr_db, n_iter
+
+            # Newton step with the calibration grid slope as derivative
+            slope = 1.0
+            if self.calib is not None:
+                try:
+                    slope = self.calib.get_slope(tx_params.f_rf, pe_cmd)
+                except ValueError:
+                    pass
+            if slope <= 0:
+                slope = 1.0
+            step = float(np.clip(err / slope, -max_step_db, max_step_db))
+            pe_next = float(np.clip(pe_cmd + step, pe_min, pe_max))
+            if pe_next == pe_cmd:
+                # Command pinned at a TX limit: the target is not reachable
+                self.err_mgr.warning(
+                    f"TX leveling stopped at the TX power limit ({pe_cmd:.2f} dBm), "
+                    f"{err:+.2f} dB from target"
+                )
+                return None, n_iter
+            pe_cmd = pe_next
+            self.tx_iface.configure_tx(replace(tx_params, pe_dbm=pe_cmd))
+
+        self.err_mgr.warning(f"TX leveling did not converge within {max_iter} iterations")
+        return None, max_iter
+
+    @staticmethod
+    def _two_tone_search_bw(delta_f, search_bw=None):
+        # Half-width of the tone/IM3 search windows: delta_f/4 by default, must stay below delta_f
+        if search_bw is None:
+            return delta_f / 4
+        if search_bw >= delta_f:
+            # IM3 window at 3*delta_f/2 would reach the fundamental at delta_f/2
+            raise ValueError(f"search_bw ({search_bw:.0f} Hz) must be below the tone spacing ({delta_f:.0f} Hz)")
+        return search_bw
+
+    def analyze_capture(self, tx_params, rx_params, rx_samples, tx_spectrum=None, search_bw=None):
+        # Two-tone analysis of one RX capture: spectrum, tone/IM3 levels and IIP3
+        """
+        Compute the RX spectrum of 'rx_samples', read the fundamentals at
+        f_rf ± delta_f/2 and the IM3 products at f_rf ± 3*delta_f/2, and
+        return a filled IIP3Result.
+
+        IIP3 is referred to the DUT input: IIP3 = P_in + Delta/2 with P_in the
+        per-tone input power tx_params.pe_dbm (what send_tx delivers once
+        calibrated). The RX tone level, which is ADC-referenced and moves
+        with g_rx_db, is kept separately in p1_rx_dbm. tx_spectrum is the optional
+        (freq_abs, P_dBm) pair returned by send_tx, stored for display.
+        search_bw is the half-width of each search window (default
+        delta_f/4); a value >= delta_f raises ValueError.
+
+        Does not log, so it can run on worker threads.
+        """
+        search_bw = self._two_tone_search_bw(tx_params.delta_f, search_bw)
+        freq_abs, P_bin, P_dBm, A_sample = self.signal_utils.compute_fft(
+            rx_samples, rx_params.fs, rx_params.f_rf
+        )
+        p_tone_pos, p_tone_neg, p_im3_pos, p_im3_neg = self.signal_utils.search_peak_in_band(
+            freq_abs, P_dBm, rx_params.f_rf, tx_params.delta_f / 2,
+            3 * tx_params.delta_f / 2, search_bw=search_bw
+        )
+        delta_db = 0.5 * ((p_tone_pos - p_im3_pos) + (p_tone_neg - p_im3_neg))
+        p1_rx_dbm = 0.5 * (p_tone_pos + p_tone_neg)
+        p_in_dbm = tx_params.pe_dbm
+        iip3_dbm = p_in_dbm + delta_db / 2.0
+
+        freq_tx, spec_tx = tx_spectrum if tx_spectrum is not None else ([], [])
+        return IIP3Result(
+            freq_tx=freq_tx,
+            spec_tx=spec_tx,
+            freq_rx=freq_abs,
+            spec_rx=P_dBm,
+            iip3_dbm=float(iip3_dbm),
+            delta_db=float(delta_db),
+            p1_avg_dbm=float(p_in_dbm),
+            p1_rx_dbm=float(p1_rx_dbm),
+        )
+
+    def measure_point(self, tx_params, rx_params, use_cache=True, dut_id=None):
+        """
+        Full two-tone measurement of one point: configure, send_tx, receive_rx
+        and analyze_capture. Returns an IIP3Result, or None on failure.
+
+        With a result cache set, results are keyed on the complete parameter
+        set, the effective commanded TX power (calibration or leveling
+        correction applied), the calibration content hash and the DUT
+        identifier (dut_id, or self.dut_id). A hit returns the stored result without touching the
+        hardware; use_cache=False bypasses the lookup and refreshes the entry.
+
+        Fresh measurements are recorded in self.results_db when set. Nothing
+        is captured, cached or recorded when send_tx fails.
+        """
+        if dut_id is None:
+            dut_id = self.dut_id
+        key = None
+        if self.result_cache is not None:
+            calib_hash = getattr(self.calib, "content_hash", None)
+            pe_cmd_dbm = self._apply_tx_calibration(tx_params).pe_dbm
+            key = ResultCache.make_key(tx_params, rx_params, calib_hash, dut_id, pe_cmd_dbm)
+            if use_cache:
+                cached = self.result_cache.get(key)
+                if cached is not None:
+                    self.err_mgr.info(f"Result cache hit: {self.result_cache.stats()}")
+                    return cached
+
+        t_start = time.perf_counter()
+        self.configure(tx_params, rx_params)
+        tx_out = self.send_tx(tx_params)
+        if tx_out is None or tx_out[0] is None:
+            # TX aborted (error already reported): the RX would only see noise
+            return None
+        rx_samples = self.receive_rx(rx_params)
+        if rx_samples is None:
+            return None
+        result = self.analyze_capture(tx_params, rx_params, rx_samples, (tx_out[0], tx_out[2]))
+
+        if self.results_db is not None:
+            self.results_db.record(
+                tx_params, rx_params, result, calib=self.calib, dut_id=dut_id,
+                duration_s=time.perf_counter() - t_start,
+            )
+
+        if key is not None:
+            self.result_cache.put(key, result)
+            event = "miss" if use_cache else "bypass"
+            self.err_mgr.info(f"Result cache {event}: {self.result_cache.stats()}")
+        return result
+
+    def measure_point_dual(self, tx_params, rx_params, ref_offset_db=0.0, search_bw=None):
+        """
+        Two-tone measurement from one dual-channel capture (AD9361 2R2T).
+
+        RX1 carries the DUT output and RX2 a coupled copy of the DUT input
+        (rx_params.g_ref_db must be set). The input tone power is read on the
+        reference channel, the fundamentals and IM3 products on the DUT
+        channel, both from the same time-aligned buffer, so the result does
+        not depend on the TX calibration.
+
+        ref_offset_db converts a reference reading at 0 dB gain into DUT input
+        power (coupler loss and ADC scale, measured once with a through):
+        P_in = P_ref - g_ref_db + ref_offset_db. search_bw is the search
+        half-width around each tone (default delta_f/4, must be below delta_f).
+
+        Returns an IIP3Result with p1_avg_dbm the input tone power; spec_tx
+        holds the reference spectrum. Returns None on failure.
+        """
+        search_bw = self._two_tone_search_bw(tx_params.delta_f, search_bw)
+        if rx_params.g_ref_db is None:
+            self.err_mgr.error("Dual-channel measurement needs RxParams.g_ref_db")
+            return None
+        if not self.rx_iface.is_connected():
+            self.err_mgr.error("Pluto RX not connected")
+            return None
+
+        self.configure(tx_params, rx_params)
+        if self.send_tx(tx_params)[0] is None:
+            return None
+        self.rx_iface.flush_buffers(n=10)
+        try:
+            dut_samples, ref_samples = self.rx_iface.receive_dual(n_samples=rx_params.n_sample)
+        except ValueError as e:
+            self.err_mgr.error(str(e))
+            return None
+
+        f_tone = tx_params.delta_f / 2
+        f_im3 = 3 * tx_params.delta_f / 2
+        freq_ref, _, P_ref, _ = self.signal_utils.compute_fft(ref_samples, rx_params.fs, rx_params.f_rf)
+        freq_dut, _, P_dut, _ = self.signal_utils.compute_fft(dut_samples, rx_params.fs, rx_params.f_rf)
+        p_in_pos, p_in_neg, _, _ = self.signal_utils.search_peak_in_band(
+            freq_ref, P_ref, rx_params.f_rf, f_tone, f_im3, search_bw=search_bw
+        )
+        p_tone_pos, p_tone_neg, p_im3_pos, p_im3_neg = self.signal_utils.search_peak_in_band(
+            freq_dut, P_dut, rx_params.f_rf, f_tone, f_im3, search_bw=search_bw
+        )
+
+        delta_db = 0.5 * ((p_tone_pos - p_im3_pos) + (p_tone_neg - p_im3_neg))
+        p_in_dbm = 0.5 * (p_in_pos + p_in_neg) - rx_params.g_ref_db + ref_offset_db
+        iip3_dbm = p_in_dbm + delta_db / 2.0
+        self.err_mgr.info(
+            f"Dual-channel: P_in={p_in_dbm:.2f} dBm, Delta={delta_db:.2f} dB, IIP3={iip3_dbm:.2f} dBm"
+        )
+        return IIP3Result(
+            freq_tx=freq_ref,
+            spec_tx=P_ref,
+            freq_rx=freq_dut,
+            spec_rx=P_dut,
+            iip3_dbm=float(iip3_dbm),
+            delta_db=float(delta_db),
+            p1_avg_dbm=float(p_in_dbm),
+            p1_rx_dbm=float(0.5 * (p_tone_pos + p_tone_neg)),
+        )
+
+    def measure_multitone(self, tx_params, rx_params, spacings, search_bw=None):
+        """
+        IM3 at several tone spacings from a single capture.
+
+        Transmits one tone pair per spacing (SignalUtils.generate_multitone_iq,
+        IM3 collision-free placement, Newman phases), captures once and reads
+        every pair's fundamentals and IM3 products with the batched peak search.
+        tx_params.delta_f is ignored. search_bw defaults to min(spacings)/8.
+
+        Returns (spacings, delta_db, p1_avg_dbm, p3_avg_dbm, iip3_dbm) as
+        arrays ordered like 'spacings', or None on failure.
+        """
+        if not self.tx_iface.is_connected() or not self.rx_iface.is_connected():
+            self.err_mgr.error("Multitone measurement needs both Pluto TX and RX connected")
+            return None
+
+        tx_corr = self._apply_tx_calibration(tx_params)
+        if tx_corr.pe_dbm > 0:
+            self.err_mgr.warning("Calibration correction is positive, which may indicate an issue.")
+            return None
+
+        spacings = np.asarray(spacings, dtype=np.float64)
+        try:
+            signal_v, signal_codes, centers, crest_db = self.signal_utils.generate_multitone_iq(
+                pe_dbm=tx_corr.pe_dbm,
+                spacings=spacings,
+                fs=tx_corr.fs,
+                n_sample=tx_corr.n_sample,
+            )
+        except ValueError as e:
+            self.err_mgr.error(str(e))
+            return None
+        self.err_mgr.info(
+            f"Multitone: {len(spacings)} pairs, centers "
+            + ", ".join(f"{c/1e6:+.3f}" for c in centers)
+            + f" MHz, crest factor {crest_db:.1f} dB"
+        )
+
+        # Load the stimulus, then one capture for every spacing
+        self.configure(tx_corr, rx_params)
+        self.tx_iface.load_waveform(signal_codes)
+        rx_samples = self.receive_rx(rx_params)
+        if rx_samples is None:
+            return None
+        freq_abs, P_bin, P_dBm, A_sample = self.signal_utils.compute_fft(
+            rx_samples, rx_params.fs, rx_params.f_rf
+        )
+
+        if search_bw is None:
+            search_bw = np.min(spacings) / 8
+        # Same spectrum viewed once per pair, without copying
+        spectra = np.broadcast_to(P_dBm, (len(spacings), len(P_dBm)))
+        delta_db, p1_avg_dbm, p3_avg_dbm, iip3_dbm = self.signal_utils.compute_delta_db_batch(
+            freq_abs, spectra, rx_params.f_rf + centers, spacings / 2, 3 * spacings / 2,
+            search_bw=search_bw
+        )
+        for sp, d, ip3 in zip(spacings, delta_db, iip3_dbm):
+            self.err_mgr.info(f"delta_f={sp/1e3:.0f} kHz: Delta={d:.2f} dB, IIP3={ip3:.2f} dBm")
+        return spacings, delta_db, p1_avg_dbm, p3_avg_dbm, iip3_dbm
+
 
 @dataclass
 class IIP3Result:
@@ -164,6 +827,7 @@ class IIP3Result:
     spec_tx: list[float]   # TX spectrum (dBm)
     freq_rx: list[float]   # RX frequency axis (Hz)
     spec_rx: list[float]   # RX spectrum (dBm)
-    iip3_dbm: float        # Computed IIP3 value (dBm)
+    iip3_dbm: float        # Input IP3, referred to the DUT input (dBm)
     delta_db: float        # Measured IM3 delta (dB)
-    p1_avg_dbm: float      # Average carrier power (dBm)
+    p1_avg_dbm: float      # Average tone power at the DUT input (dBm)
+    p1_rx_dbm: float = None  # Average tone level read by the RX (ADC-referenced, includes g_rx_db)
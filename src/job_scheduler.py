@@ -0,0 +1,217 @@
+import json
+import sqlite3
+import time
+
+from src.param import TxParams, RxParams
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          INTEGER PRIMARY KEY,
+    created     REAL NOT NULL,
+    updated     REAL NOT NULL,
+    priority    INTEGER NOT NULL DEFAULT 0,     -- Higher runs first
+    dut_id      TEXT,
+    state       TEXT NOT NULL,                  -- pending, running, done, failed
+    params      TEXT NOT NULL,                  -- JSON sweep definition
+    n_points    INTEGER NOT NULL,
+    next_point  INTEGER NOT NULL DEFAULT 0,     -- Checkpoint: first point not yet measured
+    n_failed    INTEGER NOT NULL DEFAULT 0,
+    error       TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs (state, priority);
+"""
+
+
+class JobQueue:
+    """
+    Persistent SQLite queue of sweep jobs.
+
+    A job is a sweep over f_rf x pe_dbm (frequency outer loop) for one DUT,
+    with fixed delta_f, fs, n_sample and g_rx_db. Progress is checkpointed
+    per point, so a job interrupted by a crash or restart stays 'running'
+    and resumes at its checkpoint.
+    """
+
+    def __init__(self, path="iip3_jobs.sqlite"):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(_SCHEMA)
+
+    def submit(self, dut_id, f_rf, pe_dbm, delta_f=1e6, fs=4e6, n_sample=100000,
+               g_rx_db=0, priority=0):
+        # Add a sweep job and return its id
+        params = {
+            "f_rf": [float(f) for f in f_rf],
+            "pe_dbm": [float(p) for p in pe_dbm],
+            "delta_f": float(delta_f),
+            "fs": float(fs),
+            "n_sample": int(n_sample),
+            "g_rx_db": float(g_rx_db),
+        }
+        now = time.time()
+        with self.conn:
+            cur = self.conn.execute(
+                "INSERT INTO jobs (created, updated, priority, dut_id, state, params, n_points) "
+                "VALUES (?, ?, ?, ?, 'pending', ?, ?)",
+                (now, now, priority, dut_id, json.dumps(params),
+                 len(params["f_rf"]) * len(params["pe_dbm"])),
+            )
+        return cur.lastrowid
+
+    def runnable(self):
+        # Pending jobs and interrupted running jobs
+        return self.conn.execute(
+            "SELECT * FROM jobs WHERE state IN ('pending', 'running') ORDER BY priority DESC, id"
+        ).fetchall()
+
+    def get(self, job_id):
+        return self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+    def mark_running(self, job_id):
+        with self.conn:
+            self.conn.execute(
+                "UPDATE jobs SET state = 'running', updated = ? WHERE id = ?", (time.time(), job_id)
+            )
+
+    def checkpoint(self, job_id, next_point, n_failed):
+        # Record progress; committed immediately so a crash loses at most one point
+        with self.conn:
+            self.conn.execute(
+                "UPDATE jobs SET next_point = ?, n_failed = ?, updated = ? WHERE id = ?",
+                (next_point, n_failed, time.time(), job_id),
+            )
+
+    def finish(self, job_id, state="done", error=None):
+        with self.conn:
+            self.conn.execute(
+                "UPDATE jobs SET state = ?, error = ?, updated = ? WHERE id = ?",
+                (state, error, time.time(), job_id),
+            )
+
+    def cancel(self, job_id):
+        # Remove a job that has not completed from the schedule
+        self.finish(job_id, state="failed", error="cancelled")
+
+    def close(self):
+        self.conn.close()
+
+    @staticmethod
+    def job_points(job):
+        # (TxParams, RxParams) of every point of a job, frequency outer loop
+        params = json.loads(job["params"])
+        points = []
+        for f_rf in params["f_rf"]:
+            for pe_dbm in params["pe_dbm"]:
+                tx = TxParams(
+                    f_rf=int(f_rf),
+                    delta_f=int(params["delta_f"]),
+                    fs=int(params["fs"]),
+                    pe_dbm=pe_dbm,
+                    n_sample=params["n_sample"],
+                )
+                rx = RxParams(
+                    f_rf=int(f_rf),
+                    fs=int(params["fs"]),
+                    n_sample=params["n_sample"],
+                    g_rx_db=params["g_rx_db"],
+                )
+                points.append((tx, rx))
+        return points
+
+
+class JobScheduler:
+    """
+    Single owner of the bench that runs queued jobs unattended.
+
+    Jobs are picked by priority, then grouped to minimize reconfiguration:
+    the current DUT first, then identical (fs, n_sample, delta_f) settings.
+    on_dut_change(dut_id), if given, is called before switching DUT (e.g. to
+    drive a switch matrix). Each point goes through IIP3Bench.measure_point,
+    so results land in the bench result database when one is set.
+    """
+
+    def __init__(self, bench, job_queue: JobQueue, results_db=None, on_dut_change=None):
+        self.bench = bench
+        self.queue = job_queue
+        self.on_dut_change = on_dut_change
+        self.current_dut = None
+        self._stop = False
+        if results_db is not None:
+            bench.set_results_db(results_db)
+
+    def stop(self):
+        # Request a stop after the current point (checkpoint is kept)
+        self._stop = True
+
+    def _next_job(self):
+        # Highest priority first, then the job needing the least reconfiguration
+        jobs = self.queue.runnable()
+        if not jobs:
+            return None
+
+        def cost(job):
+            params = json.loads(job["params"])
+            return (
+                -job["priority"],
+                job["dut_id"] != self.current_dut,
+                job["dut_id"] or "",
+                params["fs"],
+                params["n_sample"],
+                params["delta_f"],
+                job["id"],
+            )
+
+        return min(jobs, key=cost)
+
+    def run_job(self, job):
+        # Measure the remaining points of one job, checkpointing after each point
+        err_mgr = self.bench.err_mgr
+        job_id = job["id"]
+        points = JobQueue.job_points(job)
+        start = job["next_point"]
+        n_failed = job["n_failed"]
+
+        if job["dut_id"] != self.current_dut:
+            if self.on_dut_change is not None:
+                self.on_dut_change(job["dut_id"])
+            self.current_dut = job["dut_id"]
+        self.bench.dut_id = job["dut_id"]
+
+        self.queue.mark_running(job_id)
+        err_mgr.info(
+            f"Job {job_id} ({job['dut_id']}): points {start}/{len(points)}"
+            + (" (resumed)" if start > 0 else "")
+        )
+        try:
+            for i in range(start, len(points)):
+                if self._stop:
+                    err_mgr.info(f"Job {job_id} paused at point {i}/{len(points)}")
+                    return
+                tx, rx = points[i]
+                if self.bench.measure_point(tx, rx, dut_id=job["dut_id"]) is None:
+                    n_failed += 1
+                # Results must be on disk before the checkpoint skips this point on resume
+                if self.bench.results_db is not None:
+                    self.bench.results_db.flush()
+                self.queue.checkpoint(job_id, i + 1, n_failed)
+        except Exception as e:
+            self.queue.finish(job_id, state="failed", error=str(e))
+            err_mgr.error(f"Job {job_id} failed: {e}")
+            return
+
+        self.queue.finish(job_id, state="done")
+        err_mgr.info(f"Job {job_id} done ({n_failed} failed points)")
+
+    def run(self, max_jobs=None):
+        # Run queued jobs until the queue is empty, stop() is called or max_jobs ran
+        self._stop = False
+        n_jobs = 0
+        while not self._stop and (max_jobs is None or n_jobs < max_jobs):
+            job = self._next_job()
+            if job is None:
+                break
+            self.run_job(job)
+            n_jobs += 1
+        return n_jobs
@@ -0,0 +1,106 @@
+import queue
+import threading
+import time
+
+from src.error_manager import ErrorManager
+
+
+class MeasurementPipeline:
+    """
+    Producer/consumer pipeline overlapping acquisition and analysis.
+
+    The calling thread drives the hardware (configure, send_tx, settle,
+    receive_rx) point after point, and hands each completed capture to a pool
+    of DSP workers through a bounded queue. When the workers fall behind the
+    queue fills up and acquisition blocks (backpressure), which bounds the
+    number of captures held in memory.
+
+    The analysis callable receives (tx_params, rx_params, rx_samples,
+    tx_spectrum) and defaults to IIP3Bench.analyze_capture. It must not touch
+    the hardware or the GUI. Stage utilization is logged at the end of run().
+    """
+
+    def __init__(self, bench, n_workers=2, queue_size=4, settle_s=0.0, analyze=None):
+        self.bench = bench
+        self.n_workers = n_workers
+        self.queue_size = queue_size
+        self.settle_s = settle_s
+        self.analyze = analyze if analyze is not None else bench.analyze_capture
+        self.err_mgr: ErrorManager = bench.err_mgr
+
+    def _worker(self, jobs, results, busy, errors, k):
+        # DSP stage: analyze captures until the end-of-series sentinel
+        while True:
+            job = jobs.get()
+            if job is None:
+                return
+            i, tx_params, rx_params, rx_samples, tx_spectrum = job
+            t0 = time.perf_counter()
+            try:
+                results[i] = self.analyze(tx_params, rx_params, rx_samples, tx_spectrum)
+            except Exception as e:
+                # Keep the pipeline running: the failed point is reported as None
+                results[i] = None
+                errors.append((i, str(e)))
+            busy[k] += time.perf_counter() - t0
+
+    def run(self, points):
+        """
+        Measure a series of (tx_params, rx_params) points.
+
+        Returns the list of analysis results in point order (None for points
+        whose capture or analysis failed).
+        """
+        results = [None] * len(points)
+        jobs = queue.Queue(maxsize=self.queue_size)
+        busy = [0.0] * self.n_workers
+        errors = []
+        workers = [
+            threading.Thread(target=self._worker, args=(jobs, results, busy, errors, k), daemon=True)
+            for k in range(self.n_workers)
+        ]
+
+        t_start = time.perf_counter()
+        for w in workers:
+            w.start()
+
+        # Hardware stage on the calling thread
+        hw_busy = 0.0
+        blocked = 0.0
+        try:
+            for i, (tx_params, rx_params) in enumerate(points):
+                t0 = time.perf_counter()
+                self.bench.configure(tx_params, rx_params)
+                tx_out = self.bench.send_tx(tx_params)
+                if tx_out is None or tx_out[0] is None:
+                    # TX aborted (error already reported): skip the capture
+                    hw_busy += time.perf_counter() - t0
+                    continue
+                if self.settle_s > 0:
+                    time.sleep(self.settle_s)
+                rx_samples = self.bench.receive_rx(rx_params)
+                t1 = time.perf_counter()
+                hw_busy += t1 - t0
+                if rx_samples is None:
+                    continue
+
+                jobs.put((i, tx_params, rx_params, rx_samples, (tx_out[0], tx_out[2])))
+                blocked += time.perf_counter() - t1
+        finally:
+            for _ in workers:
+                jobs.put(None)
+            for w in workers:
+                w.join()
+
+        wall = time.perf_counter() - t_start
+        dsp_busy = sum(busy)
+        for i, msg in errors:
+            self.err_mgr.error(f"Analysis failed for point {i}: {msg}")
+        self.err_mgr.info(
+            f"Pipeline: {len(points)} points in {wall:.2f} s, "
+            f"hardware {hw_busy:.2f} s ({100 * hw_busy / max(wall, 1e-9):.0f} %), "
+            f"DSP {dsp_busy:.2f} s over {self.n_workers} workers "
+            f"({100 * dsp_busy / max(wall * self.n_workers, 1e-9):.0f} %), "
+            f"blocked on queue {blocked:.2f} s"
+        )
+        return results
@@ -0,0 +1,179 @@
+import socketserver
+import threading
+import time
+
+import numpy as np
+
+from src.signal_utils import PLUTO_DAC_FULL_SCALE
+
+
+class _SCPIHandler(socketserver.StreamRequestHandler):
+    # One client connection: newline-terminated SCPI commands, queries answered on one line
+    def handle(self):
+        sim = self.server.simulator
+        for raw in self.rfile:
+            line = raw.decode("ascii", errors="replace").strip()
+            if not line:
+                continue
+            reply = sim.execute(line)
+            if reply is not None:
+                time.sleep(sim.latency_s)
+                self.wfile.write((reply + "\n").encode("ascii"))
+                self.wfile.flush()
+
+
+class _SCPIServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class MS2840ASimulator:
+    """
+    Local stand-in for the Anritsu MS2840A spectrum analyzer over raw TCP SCPI.
+
+    Implements the commands used by Abacus_generator.measure_peak. A sweep
+    (INIT:IMM) takes 'sweep_time_s' and every query answer is delayed by
+    'latency_s' to model the network round trip. The trace is derived from the
+    cyclic buffer, LO and TX gain of a SimulatedPluto 'source'.
+
+    Connect with the pyvisa resource given by the 'resource' property.
+    """
+
+    def __init__(
+        self,
+        source,
+        host="127.0.0.1",
+        port=5025,
+        sweep_time_s=50e-3,
+        latency_s=2e-3,
+        noise_dbm_hz=-150.0,
+        meas_noise_db=0.02,
+        seed=None
+    ):
+        # Simulated Pluto whose TX output is measured
+        self.source = source
+        self.host = host
+        self.port = port
+        self.sweep_time_s = sweep_time_s
+        self.latency_s = latency_s
+        self.noise_dbm_hz = noise_dbm_hz      # Displayed average noise level density (dBm/Hz)
+        self.meas_noise_db = meas_noise_db    # Standard deviation of marker readings (dB)
+
+        # Analyzer state
+        self.f_center = 1e9
+        self.span = 2e6
+        self.rbw = 25e3
+        self.continuous = True
+        self.marker_on = False
+        self.marker_x = 0.0
+        self.marker_y = -200.0
+        self._trace_peak = (self.f_center, -200.0)
+        self.n_sweeps = 0
+
+        self._rng = np.random.default_rng(seed)
+        self._server = None
+        self._thread = None
+
+    @property
+    def resource(self):
+        # pyvisa resource string of the simulated instrument
+        return f"TCPIP0::{self.host}::{self.port}::SOCKET"
+
+    def start(self):
+        # Serve SCPI in a background thread
+        self._server = _SCPIServer((self.host, self.port), _SCPIHandler)
+        self._server.simulator = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        # Shut down the server thread
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def _sweep(self):
+        # Strongest spectral line of the TX output within the current span
+        time.sleep(self.sweep_time_s)
+        self.n_sweeps += 1
+        floor_dbm = self.noise_dbm_hz + 10.0 * np.log10(self.rbw)
+        peak = (self.f_center, floor_dbm)
+
+        src = self.source
+        buf = src._tx_buffer
+        if buf is not None and len(buf) > 0:
+            # Tone powers from the cyclic buffer, full scale = TX gain + offset
+            N = len(buf)
+            amp = np.abs(np.fft.fft(buf)) / N / PLUTO_DAC_FULL_SCALE
+            p_dbm = src.tx_hardwaregain_chan0 + src.tx_fs_offset_db + 20.0 * np.log10(np.maximum(amp, 1e-12))
+            f_abs = src.tx_lo + np.fft.fftfreq(N, d=1.0 / src.sample_rate)
+            in_span = np.abs(f_abs - self.f_center) <= self.span / 2
+            if np.any(in_span):
+                k = np.flatnonzero(in_span)[np.argmax(p_dbm[in_span])]
+                if p_dbm[k] > floor_dbm:
+                    peak = (f_abs[k], p_dbm[k])
+        self._trace_peak = peak
+
+    def execute(self, line):
+        # Apply one SCPI command; return the reply string for queries, else None
+        cmd, _, arg = line.partition(" ")
+        cmd = cmd.upper()
+        if cmd == "*IDN?":
+            return "ANRITSU,MS2840A,SIMULATOR,1.0"
+        if cmd == "*OPC?":
+            return "1"
+        if cmd == "SYST:LANG":
+            return None
+        if cmd == "SENSE:FREQUENCY:CENTER":
+            self.f_center = float(arg)
+        elif cmd == "SENSE:FREQUENCY:SPAN":
+            self.span = float(arg)
+        elif cmd == "SENSE:BANDWIDTH:RESOLUTION":
+            self.rbw = float(arg)
+        elif cmd == "INIT:CONT":
+            self.continuous = arg.strip().upper() in ("ON", "1")
+        elif cmd == "INIT:IMM":
+            self._sweep()
+        elif cmd == "CALC:MARK1:STATE":
+            self.marker_on = arg.strip().upper() in ("ON", "1")
+        elif cmd == "CALC:MARK1:MAX":
+            f_peak, p_peak = self._trace_peak
+            self.marker_x = f_peak
+            self.marker_y = p_peak + self._rng.normal(0.0, self.meas_noise_db)
+        elif cmd == "CALC:MARK1:Y?":
+            return f"{self.marker_y:.3f}"
+        elif cmd == "CALC:MARK1:X?":
+            return f"{self.marker_x:.1f}"
+        return None
+
+
+if __name__ == "__main__":
+    # Offline benchmark of the calibration sweep against simulated instruments
+    import sys
+    from Abacus_generator import run_calibration
+    from src.pluto_sim import SimulatedPluto
+    from src.pluto_tx_interface import PlutoTxInterface
+
+    pluto = SimulatedPluto()
+    sim = MS2840ASimulator(pluto, port=0).start()
+    filename = sys.argv[1] if len(sys.argv) > 1 else "sim_tx_charac.csv"
+    t_start = time.perf_counter()
+    try:
+        run_calibration(
+            filename=filename,
+            f_start=400e6,
+            f_end=1000e6,
+            f_step=100e6,
+            p_start=-30,
+            p_end=0,
+            p_step=1,
+            resource=sim.resource,
+            tx_iface=PlutoTxInterface(None, sdr=pluto),
+        )
+    finally:
+        sim.stop()
+    elapsed = time.perf_counter() - t_start
+    print(f"{sim.n_sweeps} analyzer sweeps in {elapsed:.2f} s ({sim.n_sweeps / elapsed:.1f} points/s)")
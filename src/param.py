@@ -16,3 +16,4 @@ class RxParams:
     fs: int         # Sampling rate in Hz
     n_sample: int   # Number of samples to capture
     g_rx_db: int    # RX gain setting in dB
+    g_ref_db: int = None  # RX gain of the reference channel (RX2) in dB; None = single channel
@@ -0,0 +1,42 @@
+# Fastlock slot used for LO profile recall (shared by the TX and RX synthesizers)
+FASTLOCK_SLOT = 0
+
+
+def tune_lo(iface, f_rf, channel, lo_attr, use_fastlock=True):
+    # Retune one LO of a Pluto interface, recalling a cached AD9361 fastlock profile when available
+    """
+    channel is the IIO channel of the synthesizer ("altvoltage0" for RX,
+    "altvoltage1" for TX) and lo_attr the pyadi-iio LO property ("rx_lo" or
+    "tx_lo"). The interface provides sdr, lo_hz, lo_profiles and
+    fastlock_supported.
+
+    First visit of a frequency performs a full retune, stores the resulting
+    synthesizer profile in FASTLOCK_SLOT and caches it. Later visits load the
+    cached profile back into the slot and recall it, skipping the VCO
+    calibration. Devices without fastlock attributes fall back to a plain
+    software retune.
+    """
+    tuned = False
+    if use_fastlock and iface.fastlock_supported:
+        try:
+            profile = iface.lo_profiles.get(f_rf)
+            if profile is None:
+                setattr(iface.sdr, lo_attr, f_rf)
+                tuned = True
+                iface.sdr._set_iio_attr(channel, "fastlock_store", True, FASTLOCK_SLOT)
+                profile = iface.sdr._get_iio_attr_str(channel, "fastlock_save", True)
+                iface.lo_profiles[f_rf] = profile
+            else:
+                # Saved profiles start with their slot index: rewrite it to FASTLOCK_SLOT
+                data = profile.split(" ", 1)[1]
+                iface.sdr._set_iio_attr(channel, "fastlock_load", True, f"{FASTLOCK_SLOT} {data}")
+                iface.sdr._set_iio_attr(channel, "fastlock_recall", True, FASTLOCK_SLOT)
+            iface.lo_hz = f_rf
+            return
+        except (KeyError, OSError, AttributeError):
+            # Fastlock not available on this device: use software retune from now on
+            iface.fastlock_supported = False
+
+    if not tuned:
+        setattr(iface.sdr, lo_attr, f_rf)
+    iface.lo_hz = f_rf
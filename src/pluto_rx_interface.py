@@ -1,13 +1,34 @@
+import ctypes
+
 import adi
+import numpy as np
 from src.param import *
+from src import pluto_lo
+
+# IIO channel of the RX LO synthesizer
+RX_LO_CHANNEL = "altvoltage0"
+
+# RX channels in dual-channel mode: DUT output on RX1, coupled DUT input on RX2
+DUT_CHANNEL = 0
+REF_CHANNEL = 1
 
 class PlutoRxInterface:
-    def __init__(self, ip_addr):
+    def __init__(self, ip_addr, sdr=None, dual_channel=False):
         # Initialize Pluto SDR RX interface using given IP address
+        # dual_channel opens the device as a 2R2T AD9361 (Pluto rev C / AD9361 firmware mode)
         self.ip = ip_addr  # IP address of the Pluto device
+        self.lo_hz = None             # LO frequency currently tuned (Hz)
+        self.lo_profiles = {}         # Cached fastlock profiles: f_rf -> profile string
+        self.fastlock_supported = True
+        self._rxbuf_built = (None, None)  # (IIO buffer created by _iio_rx_buffer, its length in samples)
+        if sdr is not None:
+            # Use an already created device (e.g. a SimulatedPluto)
+            self.sdr = sdr
+            self.connected = True
+            return
         try:
             # Try to create a Pluto SDR object; consider it connected if this succeeds
-            self.sdr = adi.Pluto(self.ip)
+            self.sdr = adi.ad9361(self.ip) if dual_channel else adi.Pluto(self.ip)
             self.connected = True
         except:
             # On failure, mark device as not connected (no detailed error handling here)
@@ -16,23 +37,149 @@ class PlutoRxInterface:
 
     def configure_rx(self, params: RxParams):
         # Configure RX path according to provided RxParams
-        self.sdr.rx_lo = params.f_rf                   # Set RX LO frequency (Hz)
+        if self.lo_hz != params.f_rf:
+            self.sdr.rx_lo = params.f_rf               # Set RX LO frequency (Hz), skipped if already tuned
+            self.lo_hz = params.f_rf
         self.sdr.rx_rf_bandwidth = params.fs           # Set RF bandwidth equal to sampling rate
-        self.sdr.rx_buffer_size = params.n_sample      # Number of samples per RX buffer
+        self._set_rx_buffer_size(params.n_sample)      # Number of samples per RX buffer
         self.sdr.gain_control_mode_chan0 = "manual"    # Disable AGC, use manual gain
         self.sdr.rx_hardwaregain_chan0 = params.g_rx_db  # Set manual RX gain (dB)
 
+        # Enable the reference channel only when a reference gain is requested
+        channels = [DUT_CHANNEL, REF_CHANNEL] if params.g_ref_db is not None else [DUT_CHANNEL]
+        if list(self.sdr.rx_enabled_channels) != channels:
+            if getattr(self.sdr, "_rxbuf", None) is not None:
+                self.sdr.rx_destroy_buffer()       # Channel mask is fixed at buffer creation
+            self.sdr.rx_enabled_channels = channels
+        if params.g_ref_db is not None:
+            self.sdr.gain_control_mode_chan1 = "manual"
+            self.sdr.rx_hardwaregain_chan1 = params.g_ref_db
+
+    def _set_rx_buffer_size(self, n_samples):
+        # Set the RX buffer length; a live IIO buffer has a fixed length, so it is dropped on change
+        if self.sdr.rx_buffer_size != n_samples:
+            self.sdr.rx_buffer_size = n_samples
+            if getattr(self.sdr, "_rxbuf", None) is not None:
+                self.sdr.rx_destroy_buffer()
+
+    def _iio_rx_buffer(self, n_samples=None):
+        # Underlying libiio RX buffer of the pyadi-iio device, or None if not accessible
+        if not hasattr(self.sdr, "_rx_init_channels"):
+            return None
+        if n_samples is not None:
+            self._set_rx_buffer_size(n_samples)
+        rxbuf = getattr(self.sdr, "_rxbuf", None)
+        if rxbuf is not None and self._rxbuf_built != (rxbuf, self.sdr.rx_buffer_size):
+            # Buffer created elsewhere (e.g. by sdr.rx()) or for another length: rebuild it
+            self.sdr.rx_destroy_buffer()
+            rxbuf = None
+        if rxbuf is None:
+            self.sdr._rx_init_channels()
+            self._rxbuf_built = (self.sdr._rxbuf, self.sdr.rx_buffer_size)
+        return self.sdr._rxbuf
+
+    def _raw_rx_view(self, n_samples):
+        # Refill the IIO buffer and return its interleaved int16 I/Q samples as a view (no copy)
+        try:
+            import iio
+            rxbuf = self._iio_rx_buffer(n_samples)
+            if rxbuf is None:
+                return None
+            rxbuf.refill()
+            start = iio._buffer_start(rxbuf._buffer)
+            end = iio._buffer_end(rxbuf._buffer)
+        except (ImportError, AttributeError):
+            return None
+        n_codes = (end - start) // ctypes.sizeof(ctypes.c_int16)
+        return np.ctypeslib.as_array((ctypes.c_int16 * n_codes).from_address(start))
+
     def flush_buffers(self, n=10):
-        # Flush RX buffers by performing multiple dummy reads
+        # Flush RX buffers: refill the IIO buffer without reading it when possible
+        rxbuf = None
+        try:
+            rxbuf = self._iio_rx_buffer()
+        except AttributeError:
+            pass
         for _ in range(n):
-            self.sdr.rx()
+            if rxbuf is not None:
+                rxbuf.refill()
+            else:
+                self.sdr.rx()
+
+    @staticmethod
+    def alloc_rx_buffer(n_samples, dtype=np.complex64):
+        # Allocate a buffer for receive_into(): complex samples or raw interleaved int16 I/Q
+        if np.dtype(dtype) == np.int16:
+            return np.empty(2 * n_samples, dtype=np.int16)
+        return np.empty(n_samples, dtype=dtype)
+
+    def receive_into(self, out):
+        # Fill a caller-provided buffer with one RX capture, without allocating arrays
+        """
+        out is either a complex64/complex128 array of n samples, or an int16
+        array of 2n raw interleaved I/Q codes. The buffer size of the device is
+        set to n. Returns out.
+        """
+        if len(self.sdr.rx_enabled_channels) > 1:
+            raise ValueError("receive_into() supports single-channel captures only, use receive_dual()")
+        raw_iq = out.dtype == np.int16
+        n = len(out) // 2 if raw_iq else len(out)
+
+        view = self._raw_rx_view(n)
+        if view is not None and len(view) < 2 * n:
+            # Live buffer shorter than requested: drop it and capture through sdr.rx()
+            self.sdr.rx_destroy_buffer()
+            view = None
+        if view is None:
+            # Device without direct IIO buffer access: one temporary array per capture
+            self._set_rx_buffer_size(n)
+            data = self.sdr.rx()
+            if raw_iq:
+                out[0::2] = data.real
+                out[1::2] = data.imag
+            else:
+                out[:] = data
+            return out
+
+        if raw_iq:
+            np.copyto(out, view[:2 * n])
+        else:
+            np.copyto(out.real, view[0:2 * n:2])
+            np.copyto(out.imag, view[1:2 * n:2])
+        return out
 
     def receive(self, n_samples=None):
         # Receive a buffer of samples, optionally overriding buffer size
         if n_samples is not None:
-            self.sdr.rx_buffer_size = n_samples
-        return self.sdr.rx()
+            self._set_rx_buffer_size(n_samples)
+        data = self.sdr.rx()
+        if isinstance(data, list):
+            # Dual-channel mode: single-channel callers get the DUT output
+            return data[DUT_CHANNEL]
+        return data
+
+    def receive_dual(self, n_samples=None):
+        # Capture both RX channels in one buffer: (DUT output, reference) time-aligned sample arrays
+        if n_samples is not None:
+            self._set_rx_buffer_size(n_samples)
+        data = self.sdr.rx()
+        if not isinstance(data, list) or len(data) < 2:
+            raise ValueError("Reference channel not enabled (set RxParams.g_ref_db)")
+        return data[DUT_CHANNEL], data[REF_CHANNEL]
+
+    def tune_lo(self, f_rf, use_fastlock=True):
+        # Retune the RX LO, recalling a cached AD9361 fastlock profile when available
+        pluto_lo.tune_lo(self, f_rf, RX_LO_CHANNEL, "rx_lo", use_fastlock)
 
     def is_connected(self):
         # Return connection status of the Pluto SDR device
         return self.connected
+
+    def serial_number(self):
+        # Pluto serial number from the IIO context attributes, or None if unavailable
+        if not self.connected:
+            return None
+        try:
+            return self.sdr.ctx.attrs.get("hw_serial")
+        except AttributeError:
+            return None
@@ -0,0 +1,213 @@
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from src.signal_utils import PLUTO_ADC_FULL_SCALE, PLUTO_DAC_FULL_SCALE
+
+# IIO channel names of the AD9361 local oscillators
+RX_LO_CHANNEL = "altvoltage0"
+TX_LO_CHANNEL = "altvoltage1"
+
+
+class SimulatedPluto:
+    """
+    Software stand-in for adi.Pluto, covering the attributes used by the bench.
+
+    A simulated RX device reads the cyclic buffer of its 'source' (another
+    SimulatedPluto acting as TX, or itself), passes it through a memoryless
+    third-order DUT model, scales it by the RX gain, adds noise and quantizes
+    to 12-bit codes with clipping. With rx_enabled_channels = [0, 1] (AD9361
+    2R2T layout) rx() returns [DUT output, reference], the reference being the
+    DUT input through a 'ref_coupling_db' coupler on channel 1.
+
+    Hardware timing is modeled on a virtual clock ('elapsed_s'): a full LO
+    retune costs 'lo_tune_time_s', a fastlock profile recall costs
+    'fastlock_time_s'. With realtime=True the same delays are also slept.
+    """
+
+    def __init__(
+        self,
+        source=None,
+        dut_gain_db=0.0,
+        dut_iip3_dbm=10.0,
+        tx_fs_offset_db=2.6,
+        rx_fs_dbm=0.0,
+        noise_dbm_hz=-150.0,
+        ref_coupling_db=-20.0,
+        lo_tune_time_s=10e-3,
+        fastlock_time_s=0.5e-3,
+        rx_overhead_s=1e-3,
+        fastlock=True,
+        realtime=False,
+        seed=None,
+        serial="sim0000000000"
+    ):
+        # Signal path model
+        self.source = source if source is not None else self
+        self.dut_gain_db = dut_gain_db          # DUT small-signal gain (dB)
+        self.dut_iip3_dbm = dut_iip3_dbm        # DUT input IP3 (dBm)
+        self.tx_fs_offset_db = tx_fs_offset_db  # Full-scale single tone power at 0 dB TX gain (dBm)
+        self.rx_fs_dbm = rx_fs_dbm              # Input power reaching ADC full scale at 0 dB RX gain (dBm)
+        self.noise_dbm_hz = noise_dbm_hz        # Input-referred noise density (dBm/Hz)
+        self.ref_coupling_db = ref_coupling_db  # Coupling from DUT input to the reference channel (dB)
+
+        # Timing model
+        self.lo_tune_time_s = lo_tune_time_s
+        self.fastlock_time_s = fastlock_time_s
+        self.rx_overhead_s = rx_overhead_s
+        self.fastlock = fastlock
+        self.realtime = realtime
+        self.elapsed_s = 0.0
+        self.n_full_tunes = 0
+        self.n_fastlock_recalls = 0
+
+        # Device attributes mirrored from adi.Pluto (ctx.attrs as exposed by libiio)
+        self.ctx = SimpleNamespace(attrs={"hw_serial": serial})
+        self.sample_rate = int(4e6)
+        self.rx_rf_bandwidth = int(4e6)
+        self.tx_rf_bandwidth = int(4e6)
+        self.rx_buffer_size = 1024
+        self.rx_enabled_channels = [0]
+        self.gain_control_mode_chan0 = "manual"
+        self.rx_hardwaregain_chan0 = 0
+        self.gain_control_mode_chan1 = "manual"
+        self.rx_hardwaregain_chan1 = 0
+        self.tx_hardwaregain_chan0 = -10
+        self.tx_cyclic_buffer = False
+        self._rx_lo = int(2.4e9)
+        self._tx_lo = int(2.4e9)
+        self._tx_buffer = None
+
+        # Fastlock profile slots per LO channel: slot index -> frequency (Hz)
+        self._fastlock_slots = {RX_LO_CHANNEL: {}, TX_LO_CHANNEL: {}}
+        self._rng = np.random.default_rng(seed)
+
+    def _spend(self, dt):
+        # Advance the virtual clock (and the real one in realtime mode)
+        self.elapsed_s += dt
+        if self.realtime:
+            time.sleep(dt)
+
+    def _tune(self, channel, f_hz, recall=False):
+        # Retune an LO, either through a full synthesizer calibration or a fastlock recall
+        if recall:
+            self.n_fastlock_recalls += 1
+            self._spend(self.fastlock_time_s)
+        else:
+            self.n_full_tunes += 1
+            self._spend(self.lo_tune_time_s)
+        if channel == RX_LO_CHANNEL:
+            self._rx_lo = int(f_hz)
+        else:
+            self._tx_lo = int(f_hz)
+
+    @property
+    def rx_lo(self):
+        return self._rx_lo
+
+    @rx_lo.setter
+    def rx_lo(self, value):
+        self._tune(RX_LO_CHANNEL, value)
+
+    @property
+    def tx_lo(self):
+        return self._tx_lo
+
+    @tx_lo.setter
+    def tx_lo(self, value):
+        self._tune(TX_LO_CHANNEL, value)
+
+    def _set_iio_attr(self, channel_name, attr_name, output, value, _ctrl=None):
+        # Subset of the AD9361 fastlock attributes exposed through libiio
+        if not self.fastlock or channel_name not in self._fastlock_slots:
+            raise KeyError(attr_name)
+        slots = self._fastlock_slots[channel_name]
+        lo = self._rx_lo if channel_name == RX_LO_CHANNEL else self._tx_lo
+        if attr_name == "fastlock_store":
+            slots[int(value)] = lo
+        elif attr_name == "fastlock_load":
+            # Profile format: "<slot> <data>", data encodes the LO frequency here
+            slot, data = str(value).split(" ", 1)
+            slots[int(slot)] = int(data)
+        elif attr_name == "fastlock_recall":
+            slot = int(value)
+            if slot not in slots:
+                raise OSError(f"Fastlock slot {slot} is empty")
+            self._tune(channel_name, slots[slot], recall=True)
+        else:
+            raise KeyError(attr_name)
+
+    def _get_iio_attr_str(self, channel_name, attr_name, output, _ctrl=None):
+        # Read back the profile stored in the slot last written by fastlock_store
+        if not self.fastlock or channel_name not in self._fastlock_slots:
+            raise KeyError(attr_name)
+        if attr_name != "fastlock_save":
+            raise KeyError(attr_name)
+        slots = self._fastlock_slots[channel_name]
+        if not slots:
+            raise OSError("No fastlock profile stored")
+        slot = max(slots)
+        return f"{slot} {slots[slot]}"
+
+    def tx(self, data):
+        # Load a TX buffer (cyclic mode only is modeled)
+        self._tx_buffer = np.asarray(data).astype(np.complex128)
+
+    def tx_destroy_buffer(self):
+        # Stop transmission
+        self._tx_buffer = None
+
+    def _dut_input(self, n):
+        # DUT input as complex amplitude in sqrt(mW), aligned to this device's RX LO
+        src = self.source
+        x = np.zeros(n, dtype=np.complex128)
+        if src._tx_buffer is None or len(src._tx_buffer) == 0:
+            return x
+
+        # Cyclic TX buffer read from a random position
+        buf = src._tx_buffer
+        start = int(self._rng.integers(len(buf)))
+        idx = (start + np.arange(n)) % len(buf)
+        p_fs_dbm = src.tx_hardwaregain_chan0 + src.tx_fs_offset_db
+        x[:] = buf[idx] * (np.sqrt(10.0 ** (p_fs_dbm / 10.0)) / PLUTO_DAC_FULL_SCALE)
+
+        # LO offset between TX and RX shifts the baseband spectrum
+        f_off = src._tx_lo - self._rx_lo
+        if f_off != 0:
+            if abs(f_off) >= self.sample_rate / 2:
+                x[:] = 0.0
+            else:
+                x *= np.exp(2j * np.pi * f_off / self.sample_rate * np.arange(n))
+        return x
+
+    def _dut(self, x):
+        # Memoryless third-order DUT: y = G * (x - |x|^2 x / P_iip3)
+        p_iip3_mw = 10.0 ** (self.dut_iip3_dbm / 10.0)
+        g = 10.0 ** (self.dut_gain_db / 20.0)
+        return g * (x - (np.abs(x) ** 2) * x / p_iip3_mw)
+
+    def _adc(self, y, gain_db):
+        # Add input-referred noise, apply RX gain and quantize to clipped 12-bit codes
+        n = len(y)
+        p_noise_mw = 10.0 ** ((self.noise_dbm_hz + 10.0 * np.log10(self.sample_rate)) / 10.0)
+        noise = self._rng.standard_normal(n) + 1j * self._rng.standard_normal(n)
+        y = y + noise * np.sqrt(p_noise_mw / 2.0)
+
+        p_fs_mw = 10.0 ** ((self.rx_fs_dbm - gain_db) / 10.0)
+        codes = y * (PLUTO_ADC_FULL_SCALE / np.sqrt(p_fs_mw))
+        i = np.clip(np.round(codes.real), -PLUTO_ADC_FULL_SCALE, PLUTO_ADC_FULL_SCALE - 1)
+        q = np.clip(np.round(codes.imag), -PLUTO_ADC_FULL_SCALE, PLUTO_ADC_FULL_SCALE - 1)
+        return i + 1j * q
+
+    def rx(self):
+        # Capture one RX buffer of simulated ADC codes
+        n = int(self.rx_buffer_size)
+        self._spend(self.rx_overhead_s + n / self.sample_rate)
+        x = self._dut_input(n)
+        y = self._adc(self._dut(x), self.rx_hardwaregain_chan0)
+        if len(self.rx_enabled_channels) < 2:
+            return y
+        # Reference channel: coupled DUT input, sampled on the same clock
+        ref = self._adc(x * 10.0 ** (self.ref_coupling_db / 20.0), self.rx_hardwaregain_chan1)
+        return [y, ref]
@@ -1,10 +1,22 @@
 import adi
 from src.param import *
+from src import pluto_lo
+
+# IIO channel of the TX LO synthesizer
+TX_LO_CHANNEL = "altvoltage1"
 
 class PlutoTxInterface:
-    def __init__(self, ip_addr):
+    def __init__(self, ip_addr, sdr=None):
         # Initialize Pluto SDR TX interface using the given IP address
         self.ip = ip_addr  # IP address of the Pluto TX device
+        self.lo_hz = None             # LO frequency currently tuned (Hz)
+        self.lo_profiles = {}         # Cached fastlock profiles: f_rf -> profile string
+        self.fastlock_supported = True
+        if sdr is not None:
+            # Use an already created device (e.g. a SimulatedPluto)
+            self.sdr = sdr
+            self.connected = True
+            return
         try:
             # Try to create a Pluto SDR object; mark as connected if this succeeds
             self.sdr = adi.Pluto(self.ip)
@@ -18,7 +30,9 @@ class PlutoTxInterface:
         # Configure TX path according to provided TxParams
         self.sdr.sample_rate = params.fs           # Set DAC sample rate (Hz)
         self.sdr.tx_rf_bandwidth = params.fs       # Set TX RF bandwidth equal to sample rate
-        self.sdr.tx_lo = params.f_rf               # Set TX LO frequency (Hz)
+        if self.lo_hz != params.f_rf:
+            self.sdr.tx_lo = params.f_rf           # Set TX LO frequency (Hz), skipped if already tuned
+            self.lo_hz = params.f_rf
         self.sdr.tx_hardwaregain_chan0 = params.pe_dbm  # Set TX output power (dB scale)
 
     def load_waveform(self, signal_codes):
@@ -31,6 +45,19 @@ class PlutoTxInterface:
         # Stop transmission by destroying the TX buffer
         self.sdr.tx_destroy_buffer()
 
+    def tune_lo(self, f_rf, use_fastlock=True):
+        # Retune the TX LO, recalling a cached AD9361 fastlock profile when available
+        pluto_lo.tune_lo(self, f_rf, TX_LO_CHANNEL, "tx_lo", use_fastlock)
+
     def is_connected(self):
         # Return connection status of the Pluto SDR device
         return self.connected
+
+    def serial_number(self):
+        # Pluto serial number from the IIO context attributes, or None if unavailable
+        if not self.connected:
+            return None
+        try:
+            return self.sdr.ctx.attrs.get("hw_serial")
+        except AttributeError:
+            return None
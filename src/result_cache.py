@@ -0,0 +1,79 @@
+import time
+from collections import OrderedDict
+
+
+class ResultCache:
+    """
+    Size-bounded LRU cache of measurement results with a time-to-live.
+
+    Keys describe the complete bench state of a measurement (see make_key);
+    entries older than ttl_s are treated as misses and dropped. Hit, miss
+    and eviction counters are kept for reporting.
+    """
+
+    def __init__(self, max_entries=128, ttl_s=3600.0):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._entries = OrderedDict()   # key -> (timestamp, value), oldest first
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(tx_params, rx_params, calib_hash=None, dut_id=None, pe_cmd_dbm=None):
+        # Full parameter set of a measurement point, plus calibration content, DUT and
+        # effective commanded TX power (after calibration or closed-loop leveling)
+        return (
+            tx_params.f_rf,
+            tx_params.pe_dbm,
+            pe_cmd_dbm,
+            tx_params.delta_f,
+            tx_params.fs,
+            tx_params.n_sample,
+            rx_params.f_rf,
+            rx_params.fs,
+            rx_params.n_sample,
+            rx_params.g_rx_db,
+            calib_hash,
+            dut_id,
+        )
+
+    def get(self, key):
+        # Return the cached value for key, or None on a miss or an expired entry
+        entry = self._entries.get(key)
+        if entry is not None:
+            ts, value = entry
+            if self.ttl_s is None or time.time() - ts <= self.ttl_s:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        # Store a value, evicting the least recently used entries beyond max_entries
+        self._entries[key] = (time.time(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key=None):
+        # Drop one entry, or the whole cache if key is None
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def stats(self):
+        # Short summary of the cache counters for logging
+        total = self.hits + self.misses
+        rate = 100.0 * self.hits / total if total else 0.0
+        return (
+            f"{self.hits} hits / {self.misses} misses ({rate:.0f} %), "
+            f"{len(self._entries)}/{self.max_entries} entries, {self.evictions} evictions"
+        )
+
+    def __len__(self):
+        return len(self._entries)
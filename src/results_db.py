@@ -0,0 +1,153 @@
+import sqlite3
+import threading
+import time
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS measurements (
+    id          INTEGER PRIMARY KEY,
+    ts          REAL NOT NULL,      -- Unix time of the measurement (s)
+    dut_id      TEXT,               -- DUT identifier
+    f_rf        REAL NOT NULL,      -- RF frequency (Hz)
+    pe_dbm      REAL NOT NULL,      -- Commanded power per tone (dBm)
+    delta_f     REAL,               -- Tone spacing (Hz)
+    fs          REAL,               -- Sampling rate (Hz)
+    n_sample    INTEGER,            -- Captured samples
+    g_rx_db     REAL,               -- RX gain (dB)
+    calib_path  TEXT,               -- Calibration file used
+    calib_hash  TEXT,               -- Calibration content hash
+    p_in_dbm    REAL,               -- Tone power at the DUT input (dBm), reference plane of iip3_dbm
+    p_tone_dbm  REAL,               -- Average fundamental read by the RX, minus g_rx_db (ADC-referenced)
+    p_im3_dbm   REAL,               -- Average IM3 read by the RX, minus g_rx_db (ADC-referenced)
+    delta_db    REAL,               -- Fundamental - IM3 (dB)
+    iip3_dbm    REAL,               -- Input IP3 = p_in_dbm + delta_db / 2 (dBm)
+    duration_s  REAL,               -- Measurement duration (s)
+    raw_path    TEXT                -- Optional pointer to the raw capture
+);
+CREATE INDEX IF NOT EXISTS idx_meas_dut_ts ON measurements (dut_id, ts);
+CREATE INDEX IF NOT EXISTS idx_meas_dut_freq_power ON measurements (dut_id, f_rf, pe_dbm);
+CREATE INDEX IF NOT EXISTS idx_meas_ts ON measurements (ts);
+"""
+
+_COLUMNS = (
+    "ts", "dut_id", "f_rf", "pe_dbm", "delta_f", "fs", "n_sample", "g_rx_db",
+    "calib_path", "calib_hash", "p_in_dbm", "p_tone_dbm", "p_im3_dbm", "delta_db", "iip3_dbm",
+    "duration_s", "raw_path",
+)
+
+
+class ResultsDatabase:
+    """
+    Local SQLite store of IIP3 measurements.
+
+    Rows are buffered in memory and written in a single transaction every
+    'batch_size' records (or on flush()/close()), so sweeps do not wait on
+    disk I/O per point. Indexes on (dut_id, ts), (dut_id, f_rf, pe_dbm) and
+    ts serve per-DUT history queries.
+
+    iip3_dbm is referred to the DUT input (p_in_dbm). The RX levels
+    p_tone_dbm and p_im3_dbm have the RX gain removed, so they do not
+    depend on g_rx_db, but they stay in uncalibrated ADC-referenced units.
+    Rows written before p_in_dbm existed (NULL there) hold an RX-referred
+    iip3_dbm and are left out of iip3_vs_frequency.
+
+    The connection may be used from any thread (e.g. the hardware thread of
+    BenchServer while the database was opened on the event loop thread);
+    every access goes through an internal lock.
+    """
+
+    def __init__(self, path="iip3_results.sqlite", batch_size=64):
+        self.path = path
+        self.batch_size = batch_size
+        self._pending = []
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        # WAL keeps readers unblocked while a sweep is writing
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        # Databases created before p_in_dbm existed
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(measurements)")]
+        if "p_in_dbm" not in columns:
+            with self.conn:
+                self.conn.execute("ALTER TABLE measurements ADD COLUMN p_in_dbm REAL")
+
+    def record(self, tx_params, rx_params, result, calib=None, dut_id=None,
+               duration_s=None, raw_path=None, ts=None):
+        # Queue one IIP3Result with its parameters; written at the next batch flush
+        p_tone_dbm = None
+        if getattr(result, "p1_rx_dbm", None) is not None:
+            p_tone_dbm = result.p1_rx_dbm - rx_params.g_rx_db
+        row = (
+            time.time() if ts is None else ts,
+            dut_id,
+            tx_params.f_rf,
+            tx_params.pe_dbm,
+            tx_params.delta_f,
+            rx_params.fs,
+            rx_params.n_sample,
+            rx_params.g_rx_db,
+            getattr(calib, "csv_path", None),
+            getattr(calib, "content_hash", None),
+            result.p1_avg_dbm,
+            p_tone_dbm,
+            None if p_tone_dbm is None else p_tone_dbm - result.delta_db,
+            result.delta_db,
+            result.iip3_dbm,
+            duration_s,
+            raw_path,
+        )
+        with self._lock:
+            self._pending.append(row)
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self):
+        # Write all pending rows in one transaction
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        placeholders = ", ".join("?" for _ in _COLUMNS)
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT INTO measurements ({', '.join(_COLUMNS)}) VALUES ({placeholders})",
+                self._pending,
+            )
+        self._pending = []
+
+    def iip3_vs_frequency(self, dut_id, since_ts=None, until_ts=None, pe_dbm=None):
+        # (f_rf, pe_dbm, iip3_dbm, ts) rows of one DUT over a time range, sorted by frequency
+        self.flush()
+        query = (
+            "SELECT f_rf, pe_dbm, iip3_dbm, ts FROM measurements "
+            "WHERE dut_id = ? AND p_in_dbm IS NOT NULL"
+        )
+        args = [dut_id]
+        if since_ts is not None:
+            query += " AND ts >= ?"
+            args.append(since_ts)
+        if until_ts is not None:
+            query += " AND ts < ?"
+            args.append(until_ts)
+        if pe_dbm is not None:
+            query += " AND pe_dbm = ?"
+            args.append(pe_dbm)
+        query += " ORDER BY f_rf, ts"
+        with self._lock:
+            return self.conn.execute(query, args).fetchall()
+
+    def close(self):
+        # Flush pending rows and close the database
+        with self._lock:
+            self._flush_locked()
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -1,7 +1,122 @@
+import math
+from fractions import Fraction
+
 import numpy as np
+from scipy import signal as sp_signal
+
+# Full-scale TX code expected by pyadi-iio for the Pluto (12-bit DAC, MSB-aligned)
+PLUTO_DAC_FULL_SCALE = 2 ** 14
+# Full-scale RX code: 12-bit ADC samples sign-extended to 16 bits
+PLUTO_ADC_FULL_SCALE = 2 ** 11
+
+# DSP precision modes: (real dtype, complex dtype)
+PRECISIONS = {
+    "double": (np.float64, np.complex128),
+    "single": (np.float32, np.complex64),
+}
+
+# Taps per phase of the zoom decimation filter (Kaiser, see SignalUtils._ddc_decimate)
+DDC_TAPS_PER_PHASE = 12
+
+
+class SpectrumWorkspace:
+    """
+    Preallocated buffers for repeated centered FFTs of the same shape.
+
+    The workspace is tied to (N, fs, f_rf): the absolute frequency axis and the
+    optional window are computed once, and every output of compute() is written
+    in place with out= ufunc arguments. Repeated captures of the same shape do
+    not allocate any N-sized array.
+
+    The arrays returned by compute() are views on the internal buffers and are
+    overwritten by the next call; copy them if they must be kept. With
+    precision="single" the buffers are complex64/float32; the frequency axis
+    stays float64.
+    """
+
+    def __init__(self, N, fs, f_rf, window=None, precision="double"):
+        # Geometry of the captures handled by this workspace
+        self.N = int(N)
+        self.fs = fs
+        self.f_rf = f_rf
+        real_dtype, complex_dtype = PRECISIONS[precision]
+        self.precision = precision
+
+        # Optional window (array of length N or "hann"), None means rectangular
+        if window is None:
+            self.window = None
+            norm = self.N
+        else:
+            if isinstance(window, str):
+                if window != "hann":
+                    raise ValueError(f"Unsupported window: {window}")
+                window = np.hanning(self.N)
+            self.window = np.asarray(window, dtype=real_dtype)
+            if self.window.shape != (self.N,):
+                raise ValueError("Window length must match N")
+            # Coherent gain normalization keeps tone amplitudes unchanged
+            norm = float(np.sum(self.window))
+        self._scale = 1.0 / norm
+
+        # Cached absolute frequency axis [f_rf - fs/2; f_rf + fs/2]
+        self.freq_abs = np.fft.fftshift(np.fft.fftfreq(self.N, d=1.0 / fs))
+        self.freq_abs += f_rf
+
+        # Work buffers: input/centered spectrum, raw FFT output and real outputs
+        self._X = np.empty(self.N, dtype=complex_dtype)
+        self._X_raw = np.empty(self.N, dtype=complex_dtype)
+        self.A_sample = np.empty(self.N, dtype=real_dtype)
+        self.P_bin = np.empty(self.N, dtype=real_dtype)
+        self.P_dBm = np.empty(self.N, dtype=real_dtype)
+
+    def matches(self, N, fs, f_rf):
+        # Return True if this workspace can be reused for the given capture geometry
+        return self.N == N and self.fs == fs and self.f_rf == f_rf
+
+    def compute(self, signal_v):
+        # Same outputs as SignalUtils.compute_fft, written into the preallocated buffers
+        if len(signal_v) != self.N:
+            raise ValueError(f"Expected {self.N} samples, got {len(signal_v)}")
+
+        # Copy (and cast) samples into the complex input buffer, then window in place
+        np.copyto(self._X, signal_v, casting="unsafe")
+        if self.window is not None:
+            np.multiply(self._X, self.window, out=self._X)
+
+        # FFT into the raw buffer, then centered copy back into the input buffer
+        np.fft.fft(self._X, out=self._X_raw)
+        half = self.N // 2
+        self._X[:half] = self._X_raw[self.N - half:]
+        self._X[half:] = self._X_raw[:self.N - half]
+        np.multiply(self._X, self._scale, out=self._X)
+
+        # Magnitude, power per bin (ADC^2 scaled to ohmic load) and dBm
+        np.abs(self._X, out=self.A_sample)
+        np.square(self.A_sample, out=self.P_bin)
+        np.multiply(self.P_bin, 50 / 2, out=self.P_bin)
+        # Avoid log10(0) by enforcing a minimum power level
+        np.maximum(self.P_bin, 1e-20, out=self.P_dBm)
+        np.log10(self.P_dBm, out=self.P_dBm)
+        np.multiply(self.P_dBm, 10, out=self.P_dBm)
+
+        return self.freq_abs, self.P_bin, self.P_dBm, self.A_sample
 
 
 class SignalUtils:
+    def __init__(self, precision="double"):
+        # Working precision of the DSP chain: "double" (float64/complex128) or "single" (float32/complex64)
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision: {precision}")
+        self.precision = precision
+        self.real_dtype, self.complex_dtype = PRECISIONS[precision]
+
+    def _as_precision(self, x):
+        # Cast samples or spectra to the working precision (no copy in double mode)
+        x = np.asarray(x)
+        if self.precision == "double":
+            return x
+        return x.astype(self.complex_dtype if np.iscomplexobj(x) else self.real_dtype, copy=False)
+
     def _dbm_to_vpeak(self, pe_dbm, r_ohm=50):
         # Convert power level in dBm into peak voltage for a given load resistance
         p_w = 10.0 ** ((pe_dbm - 30.0) / 10.0)      # Power in watts from dBm
@@ -27,6 +142,326 @@ class SignalUtils:
         # Return analog-domain waveform and corresponding integer DAC codes
         return signal_v, signal_codes
 
+    def waveform_period(self, fs, freqs):
+        # Smallest number of samples holding an integer number of cycles of every tone
+        """
+        Return (period, cycles): period in samples and, for each frequency in
+        'freqs', the integer number of cycles it completes over one period.
+        A cyclic buffer made of whole periods wraps without phase discontinuity.
+        """
+        fs_frac = Fraction(fs)
+        ratios = [Fraction(f) / fs_frac for f in freqs]
+        period = 1
+        for r in ratios:
+            period = period * r.denominator // math.gcd(period, r.denominator)
+        cycles = [int(r * period) for r in ratios]
+        return period, cycles
+
+    def commensurate_spacing(self, delta_f, fs, max_period):
+        # Tone spacing closest to delta_f whose two-tone waveform period fits in max_period samples
+        """
+        The tones at ±delta_f/2 are snapped to multiples of fs/P, where P is
+        the largest divisor of fs (integer Hz) not above max_period, so the
+        waveform period divides P. Returns the snapped spacing (Hz, int).
+        """
+        fs = int(round(fs))
+        best = 1
+        for d in range(1, math.isqrt(fs) + 1):
+            if fs % d == 0:
+                for p in (d, fs // d):
+                    if p <= max_period:
+                        best = max(best, p)
+        step = fs // best
+        k = max(1, int(round(delta_f / 2 / step)))
+        return 2 * k * step
+
+    def generate_two_tone_iq(
+        self,
+        pe_dbm,
+        delta_f,
+        fs,
+        n_sample,
+        f_offset=0.0,
+        r_ohm=50,
+        dtype=None,
+        max_period=2 ** 22
+    ):
+        """
+        Synthesize a complex IQ two-tone signal by tiling one exact period.
+
+        The tones sit at f_offset ± delta_f/2 (baseband). One waveform period is
+        computed with exact integer phase arithmetic, then tiled; n_sample is
+        rounded to a whole number of periods so the TX cyclic buffer wraps
+        without phase discontinuity.
+
+        Parameters
+        ----------
+        pe_dbm : float
+            Power per tone (dBm).
+        delta_f : float
+            Spacing between the two tones (Hz).
+        fs : float
+            Sampling rate (Hz).
+        n_sample : int
+            Requested number of samples (rounded to a multiple of the period).
+        f_offset : float
+            Center of the tone pair relative to the LO (Hz).
+        dtype : numpy dtype, optional
+            np.complex128 or np.complex64 of the returned arrays; default
+            follows the precision mode. Synthesis is always done in float64,
+            only the output is cast (see synthesize_tones_iq).
+        max_period : int
+            Upper bound on the period length, guards against irrational ratios.
+
+        Returns
+        -------
+        signal_v : ndarray
+            Complex baseband waveform (V), per-tone peak voltage from pe_dbm.
+        iq_codes : ndarray
+            Complex samples with integer I/Q codes in Pluto scaling
+            (±PLUTO_DAC_FULL_SCALE), as expected by pyadi-iio tx().
+        """
+        # Each complex tone carries half the peak voltage, as v_peak*cos does
+        v_peak = self._dbm_to_vpeak(pe_dbm, r_ohm=r_ohm)
+        return self.synthesize_tones_iq(
+            (f_offset - delta_f / 2, f_offset + delta_f / 2),
+            v_peak / 2,
+            fs,
+            n_sample,
+            dtype=dtype,
+            max_period=max_period,
+        )
+
+    def synthesize_tones_iq(
+        self,
+        freqs,
+        amplitude,
+        fs,
+        n_sample,
+        phases=None,
+        dtype=None,
+        max_period=2 ** 22
+    ):
+        """
+        Sum of complex tones built from one exact period and tiled.
+
+        freqs are baseband tone frequencies (Hz), each of peak 'amplitude' (V)
+        and optional initial phase (rad). n_sample is rounded to a whole number
+        of periods. Returns (signal_v, iq_codes) as generate_two_tone_iq does.
+
+        The period and its quantization to codes are always computed in
+        float64 (tone phases and code rounding need it); only the tiled output
+        is cast to dtype, so single precision saves memory in the returned
+        arrays but not synthesis time.
+        """
+        dtype = np.dtype(self.complex_dtype if dtype is None else dtype)
+        if dtype not in (np.complex64, np.complex128):
+            raise ValueError(f"Unsupported IQ dtype: {dtype}")
+        if phases is None:
+            phases = np.zeros(len(freqs))
+
+        period, cycles = self.waveform_period(fs, freqs)
+        if period > max_period:
+            raise ValueError(f"Waveform period of {period} samples exceeds {max_period}")
+
+        # Exact phases over one period: (k * n mod P) stays integer, no drift
+        n = np.arange(period, dtype=np.int64)
+        w = 2.0 * np.pi / period
+        one_period = np.zeros(period, dtype=np.complex128)
+        for k, phi in zip(cycles, phases):
+            one_period += np.exp(1j * (w * ((k * n) % period) + phi))
+        one_period *= amplitude
+
+        # Quantize one period to Pluto codes: waveform peak maps to full scale
+        peak = np.max(np.abs(one_period))
+        scale = PLUTO_DAC_FULL_SCALE / peak if peak > 0 else 0.0
+        codes_period = np.round(one_period.real * scale) + 1j * np.round(one_period.imag * scale)
+
+        # Tile to a whole number of periods
+        n_periods = max(1, int(round(n_sample / period)))
+        signal_v = np.tile(one_period.astype(dtype), n_periods)
+        iq_codes = np.tile(codes_period.astype(dtype), n_periods)
+        return signal_v, iq_codes
+
+    def plan_multitone(self, spacings, fs, f_grid=None, guard=None, max_offset=None, max_checks=100000):
+        """
+        Place one tone pair per spacing so that IM3 products do not collide.
+
+        Pairs are placed on a grid of centers around DC by a depth-first
+        search with backtracking (widest spacing first, centers nearest DC
+        first). A placement is accepted when tones stay at least 'guard'
+        apart and, for every pair, both IM3 products (2*f1 - f2, 2*f2 - f1)
+        stay at least 'guard' away from every tone and every other
+        third-order product f_i + f_j - f_k of the whole stimulus, including
+        the IM3 products of the other pairs and products aliased from beyond
+        ±fs/2. Pairs with disjoint footprints
+        (tones and IM3 products plus guard) are tried first; if the spacings
+        do not fit side by side within ±max_offset (the sum of the
+        footprints, 3 * spacing + 2 * guard each, exceeds 2 * max_offset),
+        pairs are allowed to nest or interleave.
+
+        A spacing equal to, or twice, another one cannot be placed: the cross
+        product f_b1 + (f_a2 - f_a1) then always lands on an IM3 product of
+        pair b, whatever the centers.
+
+        Parameters
+        ----------
+        spacings : sequence of float
+            Tone spacings to characterize (Hz).
+        fs : float
+            Sampling rate (Hz).
+        f_grid : float, optional
+            Center grid step (Hz, > 0), default gcd of the half spacings.
+        guard : float, optional
+            Minimum clearance around each IM3 product (Hz), default min(spacings)/4.
+        max_offset : float, optional
+            Largest usable baseband frequency (Hz), default 0.4 * fs.
+        max_checks : int
+            Bound on the number of candidate placements checked.
+
+        Returns
+        -------
+        centers : ndarray
+            Center frequency of each pair relative to the LO (Hz), in the
+            order of 'spacings'.
+
+        Raises ValueError for non-positive spacings or f_grid, colliding
+        spacing ratios, or when no placement is found.
+        """
+        spacings = [float(s) for s in spacings]
+        if not spacings or min(spacings) <= 0:
+            raise ValueError("Spacings must be positive")
+        for a in spacings:
+            for b in spacings:
+                if a == 2 * b or (a == b and spacings.count(a) > 1):
+                    raise ValueError(f"Spacings {a} Hz and {b} Hz have colliding IM3 products")
+        if f_grid is None:
+            f_grid = 0
+            for sp in spacings:
+                f_grid = math.gcd(f_grid, int(round(sp / 2)))
+            f_grid = float(f_grid)
+        if f_grid <= 0:
+            raise ValueError(f"Center grid step must be positive, got f_grid={f_grid} Hz")
+        if guard is None:
+            guard = min(spacings) / 4
+        if max_offset is None:
+            max_offset = 0.4 * fs
+
+        def collides(pairs):
+            # True if any pair's IM3 product lies within guard of another line
+            tones = np.array([c + sgn * sp / 2 for c, sp in pairs for sgn in (-1, 1)])
+            i, j, k = np.meshgrid(*(np.arange(len(tones)),) * 3, indexing="ij")
+            keep = (k != i) & (k != j)
+            # Products beyond ±fs/2 alias back into the captured band
+            products = np.mod(tones[i[keep]] + tones[j[keep]] - tones[k[keep]] + fs / 2, fs) - fs / 2
+            # Pair whose wanted IM3 a product is (2*f_a - f_b inside one pair), else -1
+            own = np.where(
+                (i[keep] == j[keep]) & (i[keep] // 2 == k[keep] // 2), i[keep] // 2, -1
+            )
+            # Tones of different pairs must not share a search window either
+            gaps = np.abs(tones[:, None] - tones[None, :])
+            if np.any(gaps[~np.eye(len(tones), dtype=bool)] < guard):
+                return True
+            for q, (c, sp) in enumerate(pairs):
+                # Everything but the pair's own IM3, including other pairs' IM3 products
+                others = np.concatenate((tones, products[own != q]))
+                for f_im3 in (c - 3 * sp / 2, c + 3 * sp / 2):
+                    if np.any(np.abs(others - f_im3) < guard):
+                        return True
+            return False
+
+        order = sorted(range(len(spacings)), key=lambda m: -spacings[m])
+        candidates = {}
+        for idx in order:
+            reach = 3 * spacings[idx] / 2 + guard
+            if reach > max_offset:
+                raise ValueError(
+                    f"Spacing {spacings[idx]} Hz does not fit within ±{max_offset} Hz (guard {guard} Hz)"
+                )
+            # Candidate centers ordered by distance to DC: 0, +g, -g, +2g, ...
+            n_max = int((max_offset - reach) // f_grid)
+            candidates[idx] = [0.0]
+            for m in range(1, n_max + 1):
+                candidates[idx] += [m * f_grid, -m * f_grid]
+        budget = [max_checks]
+
+        def place(placed, level, disjoint):
+            # Depth-first search over the candidate centers, widest spacing first
+            if level == len(order):
+                return placed
+            idx = order[level]
+            sp = spacings[idx]
+            reach = 3 * sp / 2 + guard
+            for c in candidates[idx]:
+                if level == 0 and c < 0:
+                    # A plan mirrored around DC is also a plan: the first pair stays at c >= 0
+                    continue
+                # Disjoint pass: pair footprints (tones and IM3 plus guard) may not overlap
+                if disjoint and any(
+                    abs(c - c2) < reach + 3 * sp2 / 2 + guard for c2, sp2 in placed.values()
+                ):
+                    continue
+                if budget[0] <= 0:
+                    return None
+                budget[0] -= 1
+                pairs = list(placed.values()) + [(c, sp)]
+                if not collides(pairs):
+                    found = place({**placed, idx: (c, sp)}, level + 1, disjoint)
+                    if found is not None:
+                        return found
+            return None
+
+        # Disjoint footprints first; pairs are nested or interleaved only when they do not fit
+        placed = place({}, 0, True) or place({}, 0, False)
+        if placed is None:
+            reason = "search budget exhausted" if budget[0] <= 0 else "none exists on this grid"
+            raise ValueError(
+                f"No collision-free placement for spacings {spacings} Hz within ±{max_offset} Hz "
+                f"(f_grid {f_grid} Hz, guard {guard} Hz): {reason}"
+            )
+        return np.array([placed[m][0] for m in range(len(spacings))])
+
+    def generate_multitone_iq(
+        self,
+        pe_dbm,
+        spacings,
+        fs,
+        n_sample,
+        centers=None,
+        r_ohm=50,
+        dtype=None
+    ):
+        """
+        Multi-spacing stimulus: one tone pair per spacing, IM3 collision-free.
+
+        Pairs are placed by plan_multitone (unless 'centers' is given) and
+        tones get Newman phases (pi * k^2 / K) to keep the crest factor low.
+        All tones share the per-tone peak voltage of pe_dbm before the codes
+        are normalized to full scale.
+
+        Returns
+        -------
+        signal_v, iq_codes : ndarray
+            As generate_two_tone_iq.
+        centers : ndarray
+            Center of each pair relative to the LO (Hz).
+        crest_db : float
+            Crest factor of the stimulus (peak / RMS, dB).
+        """
+        if centers is None:
+            centers = self.plan_multitone(spacings, fs)
+        freqs = sorted(c + sgn * sp / 2 for c, sp in zip(centers, spacings) for sgn in (-1, 1))
+        K = len(freqs)
+        phases = np.pi * np.arange(K) ** 2 / K
+
+        v_peak = self._dbm_to_vpeak(pe_dbm, r_ohm=r_ohm)
+        signal_v, iq_codes = self.synthesize_tones_iq(
+            freqs, v_peak / 2, fs, n_sample, phases=phases, dtype=dtype
+        )
+        mag = np.abs(signal_v)
+        crest_db = 20 * np.log10(np.max(mag) / np.sqrt(np.mean(mag ** 2)))
+        return signal_v, iq_codes, np.asarray(centers), float(crest_db)
+
     def modulate_to_rf(self, delta_f, n_sample, signal_baseband, f_rf):
         # Perform real RF modulation of a baseband signal (theoretical model)
         fs = delta_f * 4.0
@@ -35,14 +470,24 @@ class SignalUtils:
         signal_rf_v = signal_baseband * carrier
         return signal_rf_v
 
-    def compute_fft(self, signal_v, fs, f_rf):
+    def compute_fft(self, signal_v, fs, f_rf, workspace=None):
         # Compute centered FFT, power per bin and absolute frequency axis
         """
         Spectrum in dBm per bin with centered FFT.
         Frequency axis is given as absolute frequencies around f_rf.
         signal_v: time-domain samples (int16 or float).
+        workspace: optional SpectrumWorkspace matching (len(signal_v), fs, f_rf);
+        when given, results are written into its buffers without allocation.
+        In single precision the samples are cast to complex64/float32 and every
+        output except the frequency axis stays in that precision.
         """
         N = len(signal_v)
+        if workspace is not None:
+            if not workspace.matches(N, fs, f_rf):
+                raise ValueError("SpectrumWorkspace does not match capture (N, fs, f_rf)")
+            return workspace.compute(signal_v)
+        signal_v = self._as_precision(signal_v)
+
         # Centered and normalized FFT on raw ADC codes
         X = np.fft.fftshift(np.fft.fft(signal_v)) / N
 
@@ -63,9 +508,58 @@ class SignalUtils:
         # Return absolute frequency, raw power, dBm spectrum and magnitude
         return freq_abs, P_bin, P_dBm, A_sample
 
+    def get_workspace(self, N, fs, f_rf):
+        # Return a cached SpectrumWorkspace for (N, fs, f_rf), creating it on first use
+        ws = getattr(self, "_workspace", None)
+        if ws is None or not ws.matches(N, fs, f_rf):
+            ws = SpectrumWorkspace(N, fs, f_rf, precision=self.precision)
+            self._workspace = ws
+        return ws
+
+    def tone_level_dbfs(self, samples, full_scale=PLUTO_ADC_FULL_SCALE):
+        # Level of the strongest spectral line relative to ADC full scale, and clipping flag
+        """
+        Return (level_dbfs, clipped): 0 dBFS is a single tone whose peak reaches
+        full scale; clipped is True if any I or Q sample hits the code limits.
+        """
+        x = self._as_precision(samples)
+        N = len(x)
+        peak_amp = np.max(np.abs(np.fft.fft(x))) / N
+        if not np.iscomplexobj(x):
+            # A real tone splits into two half-amplitude bins
+            peak_amp *= 2
+        level_dbfs = 20 * np.log10(max(peak_amp, 1e-20) / full_scale)
+        clipped = bool(
+            np.any(np.abs(x.real) >= full_scale - 1) or np.any(np.abs(x.imag) >= full_scale - 1)
+        )
+        return level_dbfs, clipped
+
+    def estimate_noise_floor(self, P_bin, percentile=50.0):
+        # Robust noise power per bin from a percentile of the power spectrum
+        """
+        Tones occupy a handful of bins, so a low percentile of P_bin is set by
+        noise only. Noise power per bin is exponentially distributed: the
+        returned value is the percentile rescaled to the mean noise power.
+        """
+        q = np.percentile(P_bin, percentile)
+        return q / -np.log(1.0 - percentile / 100.0)
+
+    def level_uncertainty_db(self, p_peak, p_noise, n_avg=1):
+        # Standard deviation (dB) of a tone level read from a noisy power bin
+        """
+        For a tone of power S in a bin with mean noise power N, the measured
+        power S + N has a relative standard deviation sqrt(2*S/N + 1) / (S/N + 1),
+        reduced by sqrt(n_avg) when n_avg power spectra are averaged.
+        p_peak and p_noise are linear powers in the same units.
+        """
+        snr = np.maximum(np.asarray(p_peak) / p_noise - 1.0, 0.0)
+        rel = np.sqrt(2.0 * snr + 1.0) / (snr + 1.0) / np.sqrt(n_avg)
+        return 10.0 / np.log(10.0) * rel
+
     def spectrum_to_dbm(self, spectrum, R=50):
         # Convert an amplitude spectrum into dBm assuming a resistive load
         eps = 1e-20                         # Small floor to avoid log(0)
+        spectrum = self._as_precision(spectrum)
         P_w = (np.abs(spectrum) ** 2) / R   # Power in watts from V^2/R
         P_mw = P_w * 1e3                    # Convert watts to milliwatts
         spectrum_dbm = 10.0 * np.log10(P_mw + eps)
@@ -191,3 +685,322 @@ class SignalUtils:
         p_im3_neg = local_max_in_band(f_rf-f_im3)
         
         return p_tone_pos, p_tone_neg, p_im3_pos, p_im3_neg
+
+    def _band_max_batch(self, f, spectra, targets, search_bw):
+        # Maximum of each spectrum row within ±search_bw of each of its target frequencies
+        """
+        f : (N,) shared axis or (n, N) per-row axes, each row sorted.
+        spectra : (n, N) array.
+        targets : (n, m) target frequencies.
+        Returns (values, freqs), both of shape (n, m).
+        """
+        n, N = spectra.shape
+        rows = np.arange(n)[:, None]
+        if f.ndim == 1:
+            lo = np.searchsorted(f, targets - search_bw, side="left")
+            hi = np.searchsorted(f, targets + search_bw, side="right")
+        else:
+            # Shift every row into its own disjoint range so one sorted axis serves all rows
+            rel = f - f[:, :1]
+            span = rel.max() + 4 * search_bw + 1.0
+            offsets = rows * span
+            flat = (rel + offsets).ravel()
+            t = targets - f[:, :1] + offsets
+            lo = np.searchsorted(flat, t - search_bw, side="left") - rows * N
+            hi = np.searchsorted(flat, t + search_bw, side="right") - rows * N
+            lo = np.clip(lo, 0, N)
+            hi = np.clip(hi, 0, N)
+
+        width = hi - lo
+        if np.any(width <= 0):
+            i, j = np.argwhere(width <= 0)[0]
+            raise ValueError(f"No points in band around {targets[i, j]} Hz")
+
+        # Gather fixed-width windows, masking bins beyond each band edge
+        W = int(width.max())
+        idx = lo[..., None] + np.arange(W)
+        valid = idx < hi[..., None]
+        np.minimum(idx, N - 1, out=idx)
+        m = targets.shape[1]
+        vals = np.take_along_axis(spectra, idx.reshape(n, m * W), axis=1).reshape(n, m, W)
+        vals = np.where(valid, vals, -np.inf)
+        k = np.argmax(vals, axis=2)
+        best_idx = np.take_along_axis(idx, k[..., None], axis=2)[..., 0]
+        values = np.take_along_axis(vals, k[..., None], axis=2)[..., 0]
+        if f.ndim == 1:
+            freqs = f[best_idx]
+        else:
+            freqs = np.take_along_axis(f, best_idx, axis=1)
+        return values, freqs
+
+    def search_peak_in_band_batch(
+        self,
+        f,
+        spectra_dbm,
+        f_rf,
+        f_tone,
+        f_im3,
+        search_bw=100e3
+    ):
+        """
+        Batched search_peak_in_band over a stack of spectra, in one NumPy pass.
+
+        Parameters
+        ----------
+        f : ndarray
+            Frequency axis (Hz): (N,) shared by all rows, or (n_captures, N).
+        spectra_dbm : ndarray
+            Spectra in dBm, shape (n_captures, N).
+        f_rf : float or ndarray
+            Center frequency (Hz), scalar or one per capture.
+        f_tone : float or ndarray
+            Offset of the fundamental tones from f_rf (Hz), scalar or per capture.
+        f_im3 : float or ndarray
+            Offset of the IM3 products from f_rf (Hz), scalar or per capture.
+        search_bw : float
+            Half-bandwidth of the search window around each target frequency (Hz).
+
+        Returns
+        -------
+        p_tone_pos, p_tone_neg, p_im3_pos, p_im3_neg : ndarray
+            Peak powers (dBm), each of shape (n_captures,).
+        """
+        spectra_dbm = np.atleast_2d(spectra_dbm)
+        f = np.asarray(f)
+        n = spectra_dbm.shape[0]
+        f_rf = np.broadcast_to(np.asarray(f_rf, dtype=np.float64), (n,))
+        f_tone = np.broadcast_to(np.asarray(f_tone, dtype=np.float64), (n,))
+        f_im3 = np.broadcast_to(np.asarray(f_im3, dtype=np.float64), (n,))
+
+        # Targets per row: +tone, -tone, +IM3, -IM3
+        targets = f_rf[:, None] + np.stack((f_tone, -f_tone, f_im3, -f_im3), axis=1)
+        values, _ = self._band_max_batch(f, spectra_dbm, targets, search_bw)
+        return values[:, 0], values[:, 1], values[:, 2], values[:, 3]
+
+    def compute_delta_db_batch(
+        self,
+        f,
+        spectra_dbm,
+        f_rf,
+        f_tone,
+        f_im3,
+        search_bw=100e3
+    ):
+        """
+        Batched two-tone analysis: Delta_dB and IIP3 for every spectrum row.
+
+        Takes the same arguments as search_peak_in_band_batch.
+
+        Returns
+        -------
+        delta_db : ndarray
+            Average (P_fundamental - P_IM3) over both sides (dB).
+        P1_avg_dbm : ndarray
+            Average power of the two fundamental tones (dBm).
+        P3_avg_dbm : ndarray
+            Average power of the two IM3 products (dBm).
+        iip3_dbm : ndarray
+            Intercept point P1_avg + Delta_dB / 2 (dBm).
+        """
+        p_tone_pos, p_tone_neg, p_im3_pos, p_im3_neg = self.search_peak_in_band_batch(
+            f, spectra_dbm, f_rf, f_tone, f_im3, search_bw=search_bw
+        )
+        delta_db = 0.5 * ((p_tone_pos - p_im3_pos) + (p_tone_neg - p_im3_neg))
+        P1_avg_dbm = 0.5 * (p_tone_pos + p_tone_neg)
+        P3_avg_dbm = 0.5 * (p_im3_pos + p_im3_neg)
+        iip3_dbm = P1_avg_dbm + delta_db / 2.0
+        return delta_db, P1_avg_dbm, P3_avg_dbm, iip3_dbm
+
+    def _ddc_decimate(self, samples, fs, f_offsets, decim, n_out=None, block=2 ** 16, taps_per_phase=DDC_TAPS_PER_PHASE):
+        """
+        Mix the capture to DC around each of 'f_offsets' and decimate by 'decim',
+        processing the capture in blocks.
+
+        The NCO is phase continuous across blocks: one block of phasors is
+        computed per offset and rotated by the exact phase of each block
+        start. Decimation is a polyphase FIR (scipy.signal.upfirdn) whose
+        history is carried from block to block, so only one block of
+        full-rate samples is held in memory at a time and only the n_out
+        decimated samples needed are computed. Outputs whose filter window
+        would reach before the first sample are dropped (no start transient).
+
+        The lowpass keeps ±fs/(4*decim) with a Kaiser (beta 10) window and
+        taps_per_phase taps per phase: the other tones of a two-tone test,
+        which alias exactly onto the center of the IM3 regions, are
+        suppressed by more than 90 dB.
+
+        Returns an array of shape (len(f_offsets), n_out).
+        """
+        x = np.asarray(samples)
+        offsets = np.atleast_1d(np.asarray(f_offsets, dtype=np.float64))
+        D = int(decim)
+        # Warm-up outputs discarded so every kept output sees a full filter window
+        skip = taps_per_phase if D > 1 else 0
+        n_avail = max(0, len(x) // D - skip)
+        n_out = n_avail if n_out is None else min(int(n_out), n_avail)
+        n_in = (n_out + skip) * D
+        R = len(offsets)
+        out = np.empty((R, n_out + skip), dtype=self.complex_dtype)
+
+        B = max(D, block // D * D)
+        w_block = np.exp(-2j * np.pi * np.outer(offsets / fs, np.arange(B))).astype(self.complex_dtype)
+        if D > 1:
+            # Filter length 1 + taps_per_phase * D keeps the delay a whole number of output samples
+            L = taps_per_phase * D + 1
+            h = sp_signal.firwin(L, 0.5 / D, window=("kaiser", 10.0)).astype(self.real_dtype)
+            hist = np.zeros((R, L - 1), dtype=self.complex_dtype)
+
+        for g0 in range(0, n_in, B):
+            blk = self._as_precision(x[g0:min(g0 + B, n_in)])
+            b = len(blk)
+            # Exact NCO phase at the block start (float64, wrapped to one cycle)
+            rot = np.exp(-2j * np.pi * np.mod(offsets / fs * g0, 1.0)).astype(self.complex_dtype)
+            y = blk[None, :] * w_block[:, :b]
+            y *= rot[:, None]
+            if D == 1:
+                out[:, g0:g0 + b] = y
+                continue
+            ext = np.concatenate((hist, y), axis=1)
+            dec = sp_signal.upfirdn(h, ext, 1, D, axis=1)
+            # Filter delay is (L - 1) / D = taps_per_phase output samples
+            out[:, g0 // D:(g0 + b) // D] = dec[:, taps_per_phase:taps_per_phase + b // D]
+            hist = ext[:, -(L - 1):]
+        return out[:, skip:]
+
+    def _zoom_spectra(self, samples, fs, f_rf, f_offsets, span, n_fft=None, n_avg=None):
+        # Zoomed power spectra around several offsets from one streaming pass, see zoom_spectrum
+        decim = max(1, int(fs // span))
+        fs_dec = fs / decim
+        # Decimated samples available once the filter warm-up is dropped
+        n_dec = max(1, len(samples) // decim - (DDC_TAPS_PER_PHASE if decim > 1 else 0))
+        if n_fft is None or n_fft > n_dec:
+            n_fft, n_avg = n_dec, 1
+        elif n_avg is None:
+            n_avg = n_dec // n_fft
+        else:
+            n_avg = max(1, min(int(n_avg), n_dec // n_fft))
+
+        streams = self._ddc_decimate(samples, fs, f_offsets, decim, n_out=n_fft * n_avg)
+        segs = streams.reshape(len(streams), n_avg, n_fft)
+
+        # Centered FFT of each segment, normalized like compute_fft, power averaged over segments
+        X = np.fft.fft(segs, axis=-1)
+        X /= n_fft
+        P_bin = np.abs(X)
+        np.square(P_bin, out=P_bin)
+        P_bin = np.fft.fftshift(P_bin.mean(axis=1), axes=-1) * (50 / 2)
+        P_dBm = 10 * np.log10(np.maximum(P_bin, 1e-20))
+        freq_rel = np.fft.fftshift(np.fft.fftfreq(n_fft, d=1.0 / fs_dec))
+        freq_abs = f_rf + np.asarray(f_offsets, dtype=np.float64)[:, None] + freq_rel
+        return freq_abs, P_dBm
+
+    def zoom_spectrum(self, samples, fs, f_rf, f_offset, span, n_fft=None, n_avg=None):
+        """
+        Narrowband spectrum around f_rf + f_offset by digital down-conversion.
+
+        The capture is streamed in blocks through a phase-continuous NCO and a
+        polyphase decimating FIR to a rate of about 'span' (see
+        _ddc_decimate), then transformed with a small FFT. The resolution
+        bandwidth is (fs / decim) / n_fft. Only n_fft * n_avg decimated
+        samples are computed; their power spectra are averaged.
+
+        Parameters
+        ----------
+        samples : ndarray
+            Complex baseband capture at fs.
+        fs : float
+            Sampling rate of the capture (Hz).
+        f_rf : float
+            LO frequency of the capture (Hz).
+        f_offset : float
+            Center of the region of interest relative to f_rf (Hz).
+        span : float
+            Bandwidth to keep around the region of interest (Hz).
+        n_fft : int, optional
+            FFT size on the decimated stream, sets the RBW (default: all
+            decimated samples in one FFT, RBW fs / len(samples)).
+        n_avg : int, optional
+            Number of n_fft segments averaged (default: as many as the
+            capture holds).
+
+        Returns
+        -------
+        freq_abs : ndarray
+            Absolute frequency axis of the zoomed spectrum (Hz).
+        P_dBm : ndarray
+            Power per bin, same scaling as compute_fft (dBm).
+        """
+        freq_abs, P_dBm = self._zoom_spectra(samples, fs, f_rf, [f_offset], span, n_fft, n_avg)
+        return freq_abs[0], P_dBm[0]
+
+    def zoom_two_tone(self, samples, fs, f_rf, delta_f, span=None, n_fft=None, n_avg=None, search_bw=None):
+        """
+        Two-tone analysis on zoomed spectra around each tone and IM3 product.
+
+        The four regions of interest, f_rf ± delta_f/2 (tones) and
+        f_rf ± 3*delta_f/2 (IM3), are down-converted in a single streaming
+        pass over the capture. The default span is delta_f/2 and the default
+        search half-bandwidth a quarter of the span; n_fft and n_avg are as in
+        zoom_spectrum.
+
+        Returns
+        -------
+        p_tone_pos, p_tone_neg, p_im3_pos, p_im3_neg : float
+            Peak powers (dBm) in each region.
+        zooms : list
+            (freq_abs, P_dBm) for each region, same order.
+        """
+        if span is None:
+            span = delta_f / 2
+        if search_bw is None:
+            search_bw = span / 4
+
+        offsets = (delta_f / 2, -delta_f / 2, 3 * delta_f / 2, -3 * delta_f / 2)
+        freq_abs, P_dBm = self._zoom_spectra(samples, fs, f_rf, offsets, span, n_fft, n_avg)
+        levels = []
+        zooms = []
+        for r, f_offset in enumerate(offsets):
+            mask = np.abs(freq_abs[r] - (f_rf + f_offset)) <= search_bw
+            if not np.any(mask):
+                raise ValueError(f"No points in band around {f_rf + f_offset} Hz")
+            levels.append(float(np.max(P_dBm[r][mask])))
+            zooms.append((freq_abs[r], P_dBm[r]))
+        return levels[0], levels[1], levels[2], levels[3], zooms
+
+
+if __name__ == "__main__":
+    # Benchmark of the two-tone zoom against a full-length FFT on a simulated capture
+    import time
+    import tracemalloc
+    from src.pluto_sim import SimulatedPluto
+
+    fs, f_rf, delta_f, n = 4e6, 1e9, 1e6, 2 ** 20
+    utils = SignalUtils()
+    tx_sdr = SimulatedPluto()
+    rx_sdr = SimulatedPluto(source=tx_sdr)
+    rx_sdr.rx_buffer_size = n
+    tx_sdr.tx(utils.generate_two_tone_iq(-20, delta_f, fs, n)[1])
+    x = rx_sdr.rx()
+
+    def full_fft():
+        freq_abs, _, P_dBm, _ = utils.compute_fft(x, fs, f_rf)
+        return utils.search_peak_in_band(freq_abs, P_dBm, f_rf, delta_f / 2, 3 * delta_f / 2, delta_f / 8)
+
+    cases = [
+        (f"compute_fft        RBW {fs / n:7.1f} Hz", full_fft),
+        (f"zoom_two_tone      RBW {fs / n:7.1f} Hz", lambda: utils.zoom_two_tone(x, fs, f_rf, delta_f)[:4]),
+        (f"zoom n_fft=4096    RBW {fs / 8 / 4096:7.1f} Hz",
+         lambda: utils.zoom_two_tone(x, fs, f_rf, delta_f, n_fft=4096, n_avg=1)[:4]),
+    ]
+    ref = None
+    for label, run in cases:
+        run()
+        tracemalloc.start()
+        t_start = time.perf_counter()
+        levels = run()
+        elapsed = time.perf_counter() - t_start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        ref = levels if ref is None else ref
+        err = max(abs(a - b) for a, b in zip(levels, ref))
+        print(f"{label}: {elapsed * 1e3:7.1f} ms, peak {peak / 2 ** 20:6.1f} MiB, max level diff {err:.4f} dB")
@@ -0,0 +1,167 @@
+import json
+import struct
+
+import numpy as np
+
+
+# File layout:
+#   MAGIC (8 bytes) | version u16 | reserved u16 | header length u32 (little-endian)
+#   JSON header | data blocks
+# The header lists every block as {name, dtype, shape, offset}, with offsets
+# relative to the start of the data section.
+MAGIC = b"IP3SPEC\0"
+VERSION = 1
+_PREAMBLE = struct.Struct("<8sHHI")
+
+
+def two_tone_offsets(delta_f):
+    # Offsets from f_rf of the IM3 products and fundamentals of a two-tone test
+    return np.array([-1.5, -0.5, 0.5, 1.5]) * delta_f
+
+
+def save_spectra(path, spectra_dbm, fs, f_rf, tone_offsets, roi_bw=10e3, n_overview=512,
+                 results=None, meta=None):
+    """
+    Write a sweep of centered dBm spectra (as returned by compute_fft) in
+    compressed form.
+
+    spectra_dbm: (M, N) spectra sharing the same N and fs, or one (N,) spectrum.
+    f_rf: center frequency of each spectrum (scalar or (M,)).
+    tone_offsets: frequencies of interest relative to f_rf, (K,) or (M, K)
+    (see two_tone_offsets).
+
+    For each spectrum the file keeps all bins within roi_bw around each tone
+    offset, a min/max envelope of the whole spectrum on n_overview bins and
+    noise-floor statistics (10/50/90 percentiles and mean, dBm), all as
+    float32. results is an optional dict of per-point scalars (e.g.
+    iip3_dbm), meta an optional JSON-serializable dict.
+    Returns the number of bytes written.
+    """
+    spectra = np.atleast_2d(np.asarray(spectra_dbm))
+    M, N = spectra.shape
+    f_rf = np.broadcast_to(np.asarray(f_rf, dtype=np.float64), (M,))
+    offsets = np.asarray(tone_offsets, dtype=np.float64)
+    offsets = np.broadcast_to(offsets, (M, offsets.shape[-1]))
+    K = offsets.shape[1]
+
+    # Same window length for every tone: rectangular (M, K, W) gather
+    df = fs / N
+    W = max(1, int(round(roi_bw / df)) | 1)
+    center = np.rint(offsets / df).astype(np.int64) + N // 2
+    start = np.clip(center - W // 2, 0, N - W)
+    idx = start[:, :, None] + np.arange(W)
+    roi = np.take_along_axis(spectra, idx.reshape(M, K * W), axis=1).reshape(M, K, W)
+
+    # Min/max envelope on n_overview bins (edge padded to a whole number of bins)
+    n_overview = min(n_overview, N)
+    step = -(-N // n_overview)
+    padded = np.pad(spectra, ((0, 0), (0, step * n_overview - N)), mode="edge")
+    blocks = padded.reshape(M, n_overview, step)
+    ov_min = blocks.min(axis=2)
+    ov_max = blocks.max(axis=2)
+
+    p10, p50, p90 = np.percentile(spectra, [10, 50, 90], axis=1)
+    noise = np.stack([p10, p50, p90, spectra.mean(axis=1)], axis=1)
+
+    arrays = [
+        ("f_rf", f_rf),
+        ("tone_offsets", offsets),
+        ("roi_start", start.astype(np.int32)),
+        ("roi", roi.astype(np.float32)),
+        ("overview_min", ov_min.astype(np.float32)),
+        ("overview_max", ov_max.astype(np.float32)),
+        ("noise", noise.astype(np.float32)),
+    ]
+    for name, values in (results or {}).items():
+        arrays.append(("result_" + name, np.broadcast_to(np.asarray(values, dtype=np.float64), (M,))))
+
+    header = {
+        "version": VERSION,
+        "n_records": M,
+        "n_bins": N,
+        "fs": float(fs),
+        "roi_bins": W,
+        "overview_step": step,
+        "noise_fields": ["p10", "p50", "p90", "mean"],
+        "meta": meta or {},
+        "blocks": [],
+    }
+    offset = 0
+    for name, arr in arrays:
+        arr = np.ascontiguousarray(arr)
+        header["blocks"].append(
+            {"name": name, "dtype": arr.dtype.newbyteorder("<").str, "shape": list(arr.shape), "offset": offset}
+        )
+        offset += arr.nbytes
+    head = json.dumps(header).encode("utf-8")
+
+    with open(path, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, VERSION, 0, len(head)))
+        f.write(head)
+        for _, arr in arrays:
+            f.write(np.ascontiguousarray(arr, dtype=np.dtype(arr.dtype).newbyteorder("<")).tobytes())
+    return _PREAMBLE.size + len(head) + offset
+
+
+class SpectrumFile:
+    """
+    Contents of a file written by save_spectra.
+
+    Blocks are read in one pass into NumPy arrays (attributes named after the
+    blocks: f_rf, tone_offsets, roi_start, roi, overview_min, overview_max,
+    noise, and result_<name> for stored results). Frequency axes are rebuilt
+    from (n_bins, fs), so no reprocessing is needed for plotting.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, _, head_len = _PREAMBLE.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a spectrum store file")
+        if version > VERSION:
+            raise ValueError(f"{path}: unsupported format version {version}")
+        base = _PREAMBLE.size + head_len
+        self.header = json.loads(data[_PREAMBLE.size:base])
+        self.n_bins = self.header["n_bins"]
+        self.fs = self.header["fs"]
+        self.meta = self.header["meta"]
+        self.blocks = []
+        for desc in self.header["blocks"]:
+            dtype = np.dtype(desc["dtype"])
+            count = int(np.prod(desc["shape"]))
+            arr = np.frombuffer(data, dtype=dtype, count=count, offset=base + desc["offset"])
+            setattr(self, desc["name"], arr.reshape(desc["shape"]))
+            self.blocks.append(desc["name"])
+
+    def __len__(self):
+        return self.header["n_records"]
+
+    def results(self):
+        # Stored per-point scalars as a dict name -> (M,) array
+        return {name[7:]: getattr(self, name) for name in self.blocks if name.startswith("result_")}
+
+    def roi_freq(self):
+        # Absolute frequency of every stored ROI bin, shape (M, K, W)
+        df = self.fs / self.n_bins
+        k = self.roi_start[:, :, None] + np.arange(self.header["roi_bins"])
+        return self.f_rf[:, None, None] + (k - self.n_bins // 2) * df
+
+    def overview_freq(self):
+        # Absolute center frequency of the overview bins, shape (M, n_overview)
+        df = self.fs / self.n_bins
+        step = self.header["overview_step"]
+        k = (np.arange(self.overview_max.shape[1]) * step + (step - 1) / 2.0).clip(max=self.n_bins - 1)
+        return self.f_rf[:, None] + (k - self.n_bins // 2) * df
+
+    def plot_trace(self, m):
+        # (freq_abs, P_dBm) of record m: overview max envelope with the ROI bins merged in
+        freq = np.concatenate([self.overview_freq()[m], self.roi_freq()[m].ravel()])
+        p_dbm = np.concatenate([self.overview_max[m], self.roi[m].ravel()])
+        order = np.argsort(freq, kind="stable")
+        return freq[order], p_dbm[order]
+
+
+def load_spectra(path):
+    # Read a spectrum store file
+    return SpectrumFile(path)
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from src.pluto_sim import SimulatedPluto
+from src.signal_utils import SignalUtils
+
+# Largest level difference accepted between double and single precision (dB)
+TOL_DB = 0.01
+
+FS = 4e6
+F_RF = 1e9
+DELTA_F = 1e6
+N_SAMPLE = 2 ** 16
+
+
+def _two_tone_capture(pe_dbm=-20.0, seed=1):
+    # Simulated RX capture of a two-tone stimulus through the default DUT model
+    tx_sdr = SimulatedPluto()
+    rx_sdr = SimulatedPluto(source=tx_sdr, seed=seed)
+    rx_sdr.rx_lo = tx_sdr.tx_lo = int(F_RF)
+    rx_sdr.rx_buffer_size = N_SAMPLE
+    _, codes = SignalUtils().generate_two_tone_iq(pe_dbm, DELTA_F, FS, N_SAMPLE)
+    tx_sdr.tx(codes)
+    return rx_sdr.rx()
+
+
+def test_tone_level_dbfs_precision():
+    samples = _two_tone_capture()
+    level_d, clipped_d = SignalUtils("double").tone_level_dbfs(samples)
+    level_s, clipped_s = SignalUtils("single").tone_level_dbfs(samples)
+    assert clipped_d == clipped_s
+    assert abs(level_d - level_s) < TOL_DB
+
+
+def test_two_tone_levels_precision():
+    samples = _two_tone_capture()
+    levels = {}
+    for precision in ("double", "single"):
+        utils = SignalUtils(precision)
+        freq_abs, _, P_dBm, _ = utils.compute_fft(samples, FS, F_RF)
+        levels[precision] = np.array(
+            utils.search_peak_in_band(freq_abs, P_dBm, F_RF, DELTA_F / 2, 3 * DELTA_F / 2, DELTA_F / 8)
+        )
+    assert np.max(np.abs(levels["double"] - levels["single"])) < TOL_DB
+
+
+def test_measure_point_precision():
+    pytest.importorskip("adi")
+    from src.error_manager import ErrorManager
+    from src.iip3_bench import IIP3Bench
+    from src.param import RxParams, TxParams
+    from src.pluto_rx_interface import PlutoRxInterface
+    from src.pluto_tx_interface import PlutoTxInterface
+
+    tx = TxParams(f_rf=int(F_RF), delta_f=int(DELTA_F), fs=int(FS), pe_dbm=-20, n_sample=N_SAMPLE)
+    rx = RxParams(f_rf=int(F_RF), fs=int(FS), n_sample=N_SAMPLE, g_rx_db=0)
+    results = {}
+    for precision in ("double", "single"):
+        # Same simulator seed: both benches see the same capture
+        tx_sdr = SimulatedPluto()
+        rx_sdr = SimulatedPluto(source=tx_sdr, seed=1)
+        bench = IIP3Bench(
+            PlutoTxInterface(None, sdr=tx_sdr), PlutoRxInterface(None, sdr=rx_sdr),
+            SignalUtils(precision), ErrorManager(lambda msg: None), None,
+        )
+        results[precision] = bench.measure_point(tx, rx)
+
+    double, single = results["double"], results["single"]
+    assert double is not None and single is not None
+    assert abs(double.p1_avg_dbm - single.p1_avg_dbm) < TOL_DB
+    assert abs(double.delta_db - single.delta_db) < TOL_DB
+    assert abs(double.iip3_dbm - single.iip3_dbm) < TOL_DB